@@ -8,12 +8,20 @@ from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils.dataframe import dataframe_to_rows
 import sqlite3
 from datetime import datetime
-from typing import List, Dict
+from typing import BinaryIO, List, Dict, Optional
 import io
+import shutil
+import tempfile
 
-def create_comprehensive_excel(job_id: str) -> bytes:
+# Ab dieser Größe lagert die Excel-Zwischendatei im ZIP-Export auf Platte aus
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+def create_comprehensive_excel(job_id: str, fileobj: Optional[BinaryIO] = None) -> Optional[bytes]:
     """
-    Erstellt umfassendes Excel mit mehreren Sheets
+    Erstellt umfassendes Excel mit mehreren Sheets.
+
+    Mit ``fileobj`` wird die Arbeitsmappe direkt dort hineingeschrieben
+    (Rückgabe ``None``), sonst als Bytes zurückgegeben.
     """
     conn = sqlite3.connect('invoices.db', check_same_thread=False)
     
@@ -85,7 +93,7 @@ def create_comprehensive_excel(job_id: str) -> bytes:
     conn.close()
     
     # Erstelle Excel
-    output = io.BytesIO()
+    output = fileobj if fileobj is not None else io.BytesIO()
     
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         # Sheet 1: Rechnungen
@@ -128,23 +136,30 @@ def create_comprehensive_excel(job_id: str) -> bytes:
             adjusted_width = min(max_length + 2, 50)
             ws.column_dimensions[column_letter].width = adjusted_width
     
-    output.seek(0)
-    return output.read()
+    if fileobj is not None:
+        return None
+    return output.getvalue()
 
-def create_zip_export(job_id: str) -> bytes:
+def create_zip_export(job_id: str, fileobj: Optional[BinaryIO] = None) -> Optional[bytes]:
     """
-    Erstellt ZIP mit Excel + JSON
+    Erstellt ZIP mit Excel + JSON.
+
+    Mit ``fileobj`` wird das Archiv direkt dort hineingeschrieben
+    (Rückgabe ``None``), sonst als Bytes zurückgegeben.
     """
     import zipfile
     import json
     from pathlib import Path
     
-    output = io.BytesIO()
+    output = fileobj if fileobj is not None else io.BytesIO()
     
     with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        # Excel hinzufügen
-        excel_bytes = create_comprehensive_excel(job_id)
-        zipf.writestr(f'report_{job_id[:8]}.xlsx', excel_bytes)
+        # Excel hinzufügen (über Spool-Datei direkt in den ZIP-Eintrag kopiert)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as excel_file:
+            create_comprehensive_excel(job_id, excel_file)
+            excel_file.seek(0)
+            with zipf.open(f'report_{job_id[:8]}.xlsx', 'w') as entry:
+                shutil.copyfileobj(excel_file, entry)
         
         # JSON-Export
         conn = sqlite3.connect('invoices.db', check_same_thread=False)
@@ -165,5 +180,6 @@ def create_zip_export(job_id: str) -> bytes:
         
         conn.close()
     
-    output.seek(0)
-    return output.read()
+    if fileobj is not None:
+        return None
+    return output.getvalue()
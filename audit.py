@@ -4,8 +4,12 @@ SBS Deutschland – Audit Log
 Protokolliert alle wichtigen Aktionen im System.
 """
 
+import atexit
 import logging
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import UTC, datetime
 from typing import Optional, List, Dict
 from database import get_connection
 
@@ -51,6 +55,141 @@ class AuditAction:
     SETTINGS_CHANGED = "admin.settings_changed"
 
 
+# Audit-Events werden gepuffert und gesammelt geschrieben: ein executemany +
+# ein Commit pro Batch statt Verbindung/Commit (fsync) pro Event.
+AUDIT_FLUSH_INTERVAL = 0.2  # Sekunden
+AUDIT_BATCH_SIZE = 500
+AUDIT_BATCH_RETRIES = 3
+AUDIT_RETRY_DELAY = 0.05  # Sekunden, wächst linear je Versuch
+
+_INSERT_SQL = """
+    INSERT INTO audit_log
+    (timestamp, user_id, user_email, action, resource_type, resource_id, details, ip_address, user_agent)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_audit_queue: "queue.Queue[tuple]" = queue.Queue()
+_audit_pending = threading.Event()
+_audit_write_lock = threading.Lock()
+_flusher_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+
+# Nur Sperren sind vorübergehend – "no such table"/fehlende Spalte wären es nie
+_TRANSIENT_MARKERS = ("locked", "busy")
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Sperre ("database is locked"/"busy") – später erneut versuchen; alles andere verwerfen."""
+    if type(exc).__name__ != "OperationalError":  # sqlite3 wie psycopg
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in _TRANSIENT_MARKERS)
+
+
+def _insert_batch(batch: list[tuple]) -> None:
+    conn = get_connection()
+    try:
+        conn.executemany(_INSERT_SQL, batch)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _insert_rows(batch: list[tuple]) -> tuple:
+    """Einzeln schreiben, damit ein fehlerhaftes Event nicht den Rest verwirft.
+
+    Gibt ``(geschrieben, erneut_einreihen)`` zurück.
+    """
+    try:
+        conn = get_connection()
+    except Exception as e:
+        if _is_transient(e):
+            logger.warning(f"Audit-Log gesperrt ({len(batch)} Events zurückgestellt): {e}")
+            return 0, list(batch)
+        logger.error(f"Audit-Log Fehler ({len(batch)} Events verworfen): {e}")
+        return 0, []
+    written, retry = 0, []
+    try:
+        for event in batch:
+            try:
+                conn.execute(_INSERT_SQL, event)
+                conn.commit()
+                written += 1
+            except Exception as e:
+                conn.rollback()
+                if _is_transient(e):
+                    retry.append(event)
+                else:
+                    logger.error(f"Audit-Log Fehler (Event {event[3]} verworfen): {e}")
+    finally:
+        conn.close()
+    return written, retry
+
+
+def _write_batch(batch: list[tuple]) -> tuple:
+    """Batch schreiben; bei Sperren erneut versuchen, zuletzt zeilenweise."""
+    for attempt in range(AUDIT_BATCH_RETRIES):
+        try:
+            _insert_batch(batch)
+            return len(batch), []
+        except Exception as e:
+            if not _is_transient(e):
+                break
+            time.sleep(AUDIT_RETRY_DELAY * (attempt + 1))
+    logger.warning(f"Audit-Log: Batch ({len(batch)} Events) fehlgeschlagen, schreibe einzeln")
+    return _insert_rows(batch)
+
+
+def flush_audit_log() -> int:
+    """Schreibt alle gepufferten Audit-Events sofort; gibt die Anzahl zurück.
+
+    Leser rufen das vorher auf, damit gerade geloggte Events sichtbar sind.
+    Events, die wegen einer Sperre nicht geschrieben werden konnten, kommen
+    zurück in die Queue und werden beim nächsten Flush erneut versucht.
+    """
+    written = 0
+    retry: list[tuple] = []
+    with _audit_write_lock:
+        while True:
+            batch = []
+            try:
+                while len(batch) < AUDIT_BATCH_SIZE:
+                    batch.append(_audit_queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                break
+            done, failed = _write_batch(batch)
+            written += done
+            retry.extend(failed)
+        for event in retry:
+            _audit_queue.put_nowait(event)
+    if retry:
+        _audit_pending.set()
+    return written
+
+
+def _flush_loop() -> None:
+    while True:
+        _audit_pending.wait()
+        time.sleep(AUDIT_FLUSH_INTERVAL)  # weitere Events in denselben Batch sammeln
+        _audit_pending.clear()
+        flush_audit_log()
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            thread = threading.Thread(target=_flush_loop, name="audit-flusher", daemon=True)
+            thread.start()
+            atexit.register(flush_audit_log)
+            _flusher = thread
+
+
 def log_audit(
     action: str,
     user_id: Optional[int] = None,
@@ -62,7 +201,7 @@ def log_audit(
     user_agent: Optional[str] = None
 ):
     """
-    Protokolliert eine Audit-Aktion.
+    Protokolliert eine Audit-Aktion (nicht blockierend, Schreiben im Hintergrund).
     
     Args:
         action: Aktionstyp (z.B. AuditAction.LOGIN)
@@ -74,23 +213,14 @@ def log_audit(
         ip_address: Client-IP
         user_agent: Browser User-Agent
     """
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO audit_log 
-            (user_id, user_email, action, resource_type, resource_id, details, ip_address, user_agent)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, user_email, action, resource_type, resource_id, details, ip_address, user_agent))
-        
-        conn.commit()
-        conn.close()
-        
-        logger.debug(f"Audit: {action} by user {user_id}")
-        
-    except Exception as e:
-        logger.error(f"Audit-Log Fehler: {e}")
+    # Zeitstempel beim Auftreten (UTC, Format wie CURRENT_TIMESTAMP), nicht beim Flush
+    timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
+    _audit_queue.put_nowait(
+        (timestamp, user_id, user_email, action, resource_type, resource_id, details, ip_address, user_agent)
+    )
+    _ensure_flusher()
+    _audit_pending.set()
+    logger.debug(f"Audit: {action} by user {user_id}")
 
 
 def get_audit_logs(
@@ -113,6 +243,7 @@ def get_audit_logs(
     Returns:
         Liste der Audit-Einträge
     """
+    flush_audit_log()
     conn = get_connection()
     conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
     cursor = conn.cursor()
@@ -144,6 +275,7 @@ def get_audit_logs(
 
 def get_audit_stats(days: int = 30) -> Dict:
     """Holt Audit-Statistiken der letzten X Tage."""
+    flush_audit_log()
     conn = get_connection()
     cursor = conn.cursor()
     
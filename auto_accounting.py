@@ -4,9 +4,15 @@ SBS Deutschland – Auto-Kontierung
 KI-basierte Kontenvorschläge für SKR03/SKR04.
 """
 
+import copy
+import hashlib
 import json
 import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from database import get_connection
 
@@ -212,6 +218,51 @@ Antworte NUR im JSON-Format:
     return rule_based
 
 
+# Inhaltsadressierter Cache für Kontenvorschläge: gleiche Rechnungsdaten
+# (wiederkehrende Lieferanten, erneute Uploads) → kein zweiter LLM-Aufruf.
+LLM_SUGGEST_TTL = 86400
+LLM_SUGGEST_CACHE_SIZE = 4096
+_llm_suggest_cache: Dict[bytes, Tuple[float, Dict]] = {}
+_llm_suggest_lock = threading.Lock()
+
+
+def _suggest_cache_key(invoice_data: Dict, skr: str) -> bytes:
+    payload = json.dumps({"d": invoice_data, "s": skr}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).digest()
+
+
+def _suggest_cache_store(key: bytes, result: Dict, now: float) -> None:
+    """Ergebnis cachen (Kopie); bei vollem Cache erst Abgelaufene, dann den ältesten Eintrag verwerfen.
+
+    Aufrufer hält ``_llm_suggest_lock``.
+    """
+    if len(_llm_suggest_cache) >= LLM_SUGGEST_CACHE_SIZE:
+        for k in [k for k, (expires, _) in _llm_suggest_cache.items() if expires <= now]:
+            del _llm_suggest_cache[k]
+        if len(_llm_suggest_cache) >= LLM_SUGGEST_CACHE_SIZE:
+            _llm_suggest_cache.pop(next(iter(_llm_suggest_cache)))
+    _llm_suggest_cache[key] = (now + LLM_SUGGEST_TTL, copy.deepcopy(result))
+
+
+def suggest_account_cached(invoice_data: Dict, skr: str = "SKR03") -> Dict:
+    """
+    ``suggest_account_with_llm`` mit Cache (24 h, Schlüssel = SHA-256 der Daten).
+    Fallbacks nach LLM-Fehlern werden nicht gecacht; Aufrufer erhalten Kopien.
+    """
+    key = _suggest_cache_key(invoice_data, skr)
+    now = time.monotonic()
+    with _llm_suggest_lock:
+        hit = _llm_suggest_cache.get(key)
+    if hit is not None and hit[0] > now:
+        return copy.deepcopy(hit[1])
+
+    result = suggest_account_with_llm(invoice_data, skr)
+    if result.get("method") != "rule_based_fallback":
+        with _llm_suggest_lock:
+            _suggest_cache_store(key, result, now)
+    return result
+
+
 def learn_from_correction(user_id: int, invoice_data: Dict, selected_account: str):
     """
     Lernt aus User-Korrekturen für bessere Vorschläge.
@@ -256,11 +307,102 @@ def get_learned_account(user_id: int, supplier: str) -> Optional[str]:
     return row[0] if row else None
 
 
+LLM_BATCH_SIZE = 16
+LLM_BATCH_WORKERS = 4
+
+
+def _llm_suggest_chunk(chunk: List[Dict], skr: str) -> Dict[int, Dict]:
+    """
+    Ein LLM-Aufruf für bis zu ``LLM_BATCH_SIZE`` Rechnungen.
+    Liefert {Position im Chunk: {"account", "name", "reason"}}; fehlende
+    oder unlesbare Positionen fehlen im Ergebnis.
+    """
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    lines = "\n".join(
+        f"{i}. Lieferant: {inv.get('rechnungsaussteller', 'Unbekannt')} | "
+        f"Beschreibung: {inv.get('leistungsbeschreibung', '')} | "
+        f"Betrag: {inv.get('betrag_brutto', 0)} EUR"
+        for i, inv in enumerate(chunk, 1)
+    )
+    prompt = f"""Du bist ein deutscher Buchhalter. Schlage für jede Rechnung das passende {skr}-Konto vor.
+
+Rechnungen:
+{lines}
+
+Antworte NUR mit einem JSON-Array, ein Objekt pro Rechnung:
+[{{"idx": 1, "account": "4XXX", "name": "Kontoname", "reason": "Kurze Begründung"}}]
+"""
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.1,
+        max_tokens=60 + 90 * len(chunk)
+    )
+    result_text = response.choices[0].message.content.strip()
+
+    json_match = re.search(r'\[.*\]', result_text, re.DOTALL)
+    if not json_match:
+        return {}
+    parsed = {}
+    for item in json.loads(json_match.group()):
+        try:
+            idx = int(item.get("idx")) - 1
+        except (TypeError, ValueError, AttributeError):
+            continue
+        if 0 <= idx < len(chunk) and item.get("account"):
+            parsed[idx] = item
+    return parsed
+
+
+def _batch_llm_suggestions(pending: List[Tuple[bytes, Dict, Dict]], skr: str) -> Dict[bytes, Dict]:
+    """LLM-Vorschläge für (Cache-Key, Rechnung, Regel-Ergebnis) in Chunks, parallel."""
+    chunks = [pending[i:i + LLM_BATCH_SIZE] for i in range(0, len(pending), LLM_BATCH_SIZE)]
+
+    def _run(chunk):
+        try:
+            return chunk, _llm_suggest_chunk([inv for _, inv, _ in chunk], skr)
+        except Exception as e:
+            logger.warning(f"LLM-Batch-Kontierung fehlgeschlagen: {e}")
+            return chunk, {}
+
+    suggestions = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(LLM_BATCH_WORKERS, len(chunks)))) as pool:
+        for chunk, parsed in pool.map(_run, chunks):
+            for idx, (key, _, rule_based) in enumerate(chunk):
+                llm_result = parsed.get(idx)
+                if llm_result is None:
+                    rule_based["method"] = "rule_based_fallback"
+                    suggestions[key] = rule_based
+                    continue
+                suggestions[key] = {
+                    "suggested": {
+                        "account": llm_result.get("account", "4900"),
+                        "name": llm_result.get("name", "Sonstige Aufwendungen"),
+                        "confidence": 0.75,
+                        "reason": llm_result.get("reason", "")
+                    },
+                    "alternatives": rule_based["alternatives"],
+                    "skr": skr,
+                    "method": "llm"
+                }
+    return suggestions
+
+
 def batch_suggest_accounts(invoices: List[Dict], user_id: int = None, skr: str = "SKR03") -> List[Dict]:
     """
     Kontierung für mehrere Rechnungen.
+
+    Reihenfolge wie bei ``suggest_account_with_llm``: gelerntes Konto →
+    regelbasiert (Konfidenz ≥ 0.6) → Cache → LLM. Alle offenen, inhaltlich
+    verschiedenen Rechnungen gehen gebündelt (``LLM_BATCH_SIZE`` pro Aufruf)
+    an das LLM statt einzeln.
     """
-    results = []
+    results: List[Optional[Dict]] = []
+    pending: Dict[bytes, Tuple[Dict, Dict]] = {}
+    waiting: List[Tuple[int, bytes, Dict]] = []
+    now = time.monotonic()
     
     for inv in invoices:
         # Erst gelernte Konten prüfen
@@ -279,9 +421,39 @@ def batch_suggest_accounts(invoices: List[Dict], user_id: int = None, skr: str =
                 })
                 continue
         
-        # Sonst KI-Vorschlag
-        suggestion = suggest_account_with_llm(inv, skr)
-        suggestion["invoice"] = inv.get("rechnungsnummer")
-        results.append(suggestion)
+        # Regelbasiert mit hoher Konfidenz braucht kein LLM
+        rule_based = suggest_account(inv, skr)
+        if rule_based["suggested"]["confidence"] >= 0.6:
+            rule_based["method"] = "rule_based"
+            rule_based["invoice"] = inv.get("rechnungsnummer")
+            results.append(rule_based)
+            continue
+        
+        key = _suggest_cache_key(inv, skr)
+        with _llm_suggest_lock:
+            hit = _llm_suggest_cache.get(key)
+        if hit is not None and hit[0] > now:
+            suggestion = copy.deepcopy(hit[1])
+            suggestion["invoice"] = inv.get("rechnungsnummer")
+            results.append(suggestion)
+            continue
+        
+        # Sonst KI-Vorschlag – Duplikate innerhalb des Batches nur einmal anfragen
+        pending.setdefault(key, (inv, rule_based))
+        waiting.append((len(results), key, inv))
+        results.append(None)
+    
+    if pending:
+        suggestions = _batch_llm_suggestions(
+            [(key, inv, rule_based) for key, (inv, rule_based) in pending.items()], skr
+        )
+        with _llm_suggest_lock:
+            for key, suggestion in suggestions.items():
+                if suggestion["method"] != "rule_based_fallback":
+                    _suggest_cache_store(key, suggestion, now)
+        for pos, key, inv in waiting:
+            suggestion = copy.deepcopy(suggestions[key])
+            suggestion["invoice"] = inv.get("rechnungsnummer")
+            results[pos] = suggestion
     
     return results
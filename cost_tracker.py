@@ -30,6 +30,8 @@ def _costs_conn():
         )
         """
     )
+    # JOIN jobs ↔ api_costs (Kosten-Analytics) ohne Full-Scan
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_api_costs_job_id ON api_costs(job_id)")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS performance_metrics (
@@ -145,6 +147,42 @@ def get_monthly_costs() -> List[Dict]:
     
     return [dict(r) for r in rows]
 
+def get_cost_totals(user_id: int) -> Dict:
+    """KPI-Summen für das Kosten-Dashboard direkt aus SQL.
+
+    ``total_cost`` deckt dieselben (max. 12) Monate ab wie ``get_monthly_costs``,
+    ``total_invoices`` summiert ``total_files`` über alle Jobs des Users.
+    """
+    conn = _costs_conn()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        WITH months AS (
+            SELECT strftime('%Y-%m', created_at) AS month
+            FROM api_costs
+            GROUP BY month
+            ORDER BY month DESC
+            LIMIT 12
+        ),
+        totals AS (
+            SELECT
+                (SELECT COALESCE(SUM(cost_usd), 0) FROM api_costs
+                 WHERE strftime('%Y-%m', created_at) IN (SELECT month FROM months)) AS total_cost,
+                (SELECT COALESCE(SUM(total_files), 0) FROM jobs WHERE user_id = ?) AS total_invoices
+        )
+        SELECT total_cost, total_invoices,
+               COALESCE(total_cost * 1.0 / NULLIF(total_invoices, 0), 0)
+        FROM totals
+    ''', (user_id,))
+    total_cost, total_invoices, avg_cost_per_invoice = cursor.fetchone()
+    conn.close()
+    
+    return {
+        'total_cost': total_cost,
+        'total_invoices': total_invoices,
+        'avg_cost_per_invoice': avg_cost_per_invoice
+    }
+
 def track_performance_metric(job_id: str, metric_name: str, value: float, unit: str):
     """Speichere Performance-Metrik"""
     conn = _costs_conn()
@@ -6,11 +6,19 @@ Anpassbare Dashboard-Komponenten für jeden User.
 
 import json
 import logging
+import threading
+import time
 from typing import Dict, List, Optional
 from database import get_connection
 
 logger = logging.getLogger(__name__)
 
+# Kurzlebiger Cache für Widget-Daten: (widget_type, user_id, config-JSON) → (Ablaufzeit, Daten)
+WIDGET_DATA_TTL = 30
+WIDGET_DATA_CACHE_SIZE = 1024
+_widget_data_cache: Dict[tuple, tuple] = {}
+_widget_data_lock = threading.Lock()
+
 
 # Verfügbare Widget-Typen
 class WidgetType:
@@ -59,6 +67,26 @@ def get_user_widgets(user_id: int) -> List[Dict]:
     return widgets
 
 
+def get_widget_by_id(widget_id: int, user_id: int) -> Optional[Dict]:
+    """Holt ein einzelnes sichtbares Widget des Users (oder None)."""
+    conn = get_connection()
+    conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT * FROM dashboard_widgets 
+        WHERE id = ? AND user_id = ? AND is_visible = 1
+    """, (widget_id, user_id))
+    
+    widget = cursor.fetchone()
+    conn.close()
+    
+    if widget:
+        widget['config'] = json.loads(widget['config']) if widget['config'] else {}
+    
+    return widget
+
+
 def init_default_widgets(user_id: int) -> List[Dict]:
     """Initialisiert Standard-Widgets für neuen User."""
     conn = get_connection()
@@ -215,7 +243,7 @@ def get_widget_data(widget_type: str, user_id: int, config: Dict = None) -> Dict
     
     elif widget_type == WidgetType.RECENT_JOBS:
         cursor.execute("""
-            SELECT job_id, filename, status, created_at, invoice_count
+            SELECT job_id, upload_path, status, created_at, total_files
             FROM jobs
             WHERE user_id = ?
             ORDER BY created_at DESC
@@ -262,3 +290,26 @@ def get_widget_data(widget_type: str, user_id: int, config: Dict = None) -> Dict
     
     conn.close()
     return data
+
+
+def get_widget_data_cached(widget_type: str, user_id: int, config: Dict = None) -> Dict:
+    """Wie ``get_widget_data``, aber bis zu ``WIDGET_DATA_TTL`` Sekunden gecacht."""
+    key = (widget_type, user_id, json.dumps(config or {}, sort_keys=True))
+    now = time.monotonic()
+    with _widget_data_lock:
+        hit = _widget_data_cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    
+    data = get_widget_data(widget_type, user_id, config)
+    
+    with _widget_data_lock:
+        if len(_widget_data_cache) >= WIDGET_DATA_CACHE_SIZE:
+            # Abgelaufene raus; reicht das nicht, die ältesten Einträge
+            for k in [k for k, (expires, _) in _widget_data_cache.items() if expires <= now]:
+                del _widget_data_cache[k]
+            while len(_widget_data_cache) >= WIDGET_DATA_CACHE_SIZE:
+                del _widget_data_cache[next(iter(_widget_data_cache))]
+        _widget_data_cache[key] = (now + WIDGET_DATA_TTL, data)
+    
+    return data
@@ -10,9 +10,11 @@ import hmac
 import json
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -54,9 +56,148 @@ def get_connection():
     db_path = _ensure_db_path()
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
+    _configure_sqlite(conn, db_path)
     return conn
 
 
+def get_readonly_connection():
+    """Read-only SQLite-Verbindung für schwere Lese-Abfragen (z. B. Audit-Log).
+
+    Öffnet die DB per URI mit ``mode=ro`` und setzt ``query_only`` – unter WAL
+    liest sie einen eigenen Snapshot und wartet nie auf Schreiber. Die DB-Datei
+    wird per mmap (``SQLITE_RO_MMAP_SIZE``) gelesen. Bei PostgreSQL wie
+    ``get_connection()``.
+    """
+    try:
+        from db_compat import is_postgres, connect_postgres
+        if is_postgres():
+            return connect_postgres()
+    except Exception as exc:  # pragma: no cover - Fallback auf SQLite
+        logger.error("PostgreSQL-Verbindung fehlgeschlagen, nutze SQLite: %s", exc)
+
+    return _connect_readonly(_ensure_db_path())
+
+
+# Verbindungspool für Request-Handler (nur SQLite): spart connect + PRAGMAs pro Request
+SQLITE_POOL_SIZE = 16
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # 256 MiB
+SQLITE_RO_MMAP_SIZE = 1 << 30  # 1 GiB, nur Lese-Verbindungen
+_sqlite_pools: Dict[Tuple[Path, bool], queue.LifoQueue] = {}
+_sqlite_pools_lock = threading.Lock()
+
+
+def _sqlite_pool(db_path: Path, readonly: bool = False) -> queue.LifoQueue:
+    key = (db_path, readonly)
+    with _sqlite_pools_lock:
+        pool = _sqlite_pools.get(key)
+        if pool is None:
+            pool = _sqlite_pools[key] = queue.LifoQueue(maxsize=SQLITE_POOL_SIZE)
+        return pool
+
+
+def _connect_pooled(db_path: Path) -> sqlite3.Connection:
+    # Setup und Teardown der Dependency können in verschiedenen Threads laufen
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    _configure_sqlite(conn, db_path)
+    # Nur für langlebige Pool-Verbindungen: Temp-B-Trees im RAM, DB-Datei
+    # per mmap lesen (Mapping lohnt sich erst bei Wiederverwendung)
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    return conn
+
+
+def _connect_readonly(db_path: Path) -> sqlite3.Connection:
+    if not db_path.exists():
+        # mode=ro legt keine Datei an – Schreiber (Schema/WAL) zuerst
+        get_connection().close()
+    conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_RO_MMAP_SIZE}")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _pooled_sqlite(pool: queue.LifoQueue, connect):
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = connect()
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _use_postgres() -> bool:
+    try:
+        from db_compat import is_postgres
+        return is_postgres()
+    except Exception:  # pragma: no cover - wie get_connection: Fallback auf SQLite
+        return False
+
+
+def get_db():
+    """FastAPI-Dependency: eine DB-Verbindung pro Request.
+
+    SQLite-Verbindungen kommen aus einem Pool pro DB-Datei und gehen nach dem
+    Request zurück (offene Transaktionen werden zurückgerollt). Bei PostgreSQL
+    wird wie bisher pro Request verbunden und geschlossen.
+    """
+    if _use_postgres():
+        conn = get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    db_path = _ensure_db_path()
+    yield from _pooled_sqlite(_sqlite_pool(db_path), lambda: _connect_pooled(db_path))
+
+
+def get_readonly_db():
+    """FastAPI-Dependency: gepoolte read-only Verbindung (``get_readonly_connection``).
+
+    Für reine Lese-Endpunkte; eigener Pool neben ``get_db``.
+    """
+    if _use_postgres():
+        conn = get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    db_path = _ensure_db_path()
+    yield from _pooled_sqlite(_sqlite_pool(db_path, readonly=True), lambda: _connect_readonly(db_path))
+
+
+# DB-Dateien, auf denen WAL bereits aktiviert wurde (journal_mode ist persistent)
+_wal_db_paths: set = set()
+
+
+def _configure_sqlite(conn: sqlite3.Connection, db_path: Path) -> None:
+    """WAL (Leser blockieren Schreiber nicht) + synchronous=NORMAL pro Verbindung.
+
+    ``journal_mode=WAL`` bleibt in der Datei gespeichert und wird daher nur
+    einmal pro Prozess und Pfad gesetzt; ``synchronous`` gilt je Verbindung.
+    """
+    if db_path not in _wal_db_paths:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            _wal_db_paths.add(db_path)
+        except sqlite3.DatabaseError as exc:  # pragma: no cover - z. B. read-only Dateisystem
+            logger.warning("WAL konnte nicht aktiviert werden: %s", exc)
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+
 def get_db_path() -> str:
     """Public helper: kanonischer Pfad zur SQLite-DB (für Module mit eigener
     Connection wie approval.py / zahlungs_service.py)."""
@@ -1273,6 +1414,8 @@ def init_users_table():
         cursor.execute('ALTER TABLE users ADD COLUMN totp_enabled INTEGER DEFAULT 0')
     if 'approval_limit' not in user_cols:
         cursor.execute('ALTER TABLE users ADD COLUMN approval_limit REAL')
+    if 'current_org_id' not in user_cols:
+        cursor.execute('ALTER TABLE users ADD COLUMN current_org_id INTEGER')
 
     # Export-Historie (von /exports und Export-Funktionen genutzt)
     cursor.execute('''
@@ -1433,6 +1576,41 @@ def get_user_subscription(user_id: int) -> dict:
     conn.close()
     return dict(row) if row else None
 
+def get_user_with_subscription(user_id: int) -> Tuple[Optional[dict], Optional[dict]]:
+    """User + aktive Subscription in einer Query.
+
+    Liefert ``(user, subscription)`` in derselben Form wie
+    ``get_user_by_id`` + ``get_user_subscription``.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT u.id, u.email, u.name, u.company, u.is_admin, u.totp_enabled, s.*
+        FROM users u
+        LEFT JOIN subscriptions s ON s.id = (
+            SELECT id FROM subscriptions
+            WHERE user_id = u.id AND status = 'active'
+            ORDER BY created_at DESC LIMIT 1
+        )
+        WHERE u.id = ?
+    ''', (user_id,))
+    row = cursor.fetchone()
+    sub_columns = [col[0] for col in cursor.description[6:]]
+    conn.close()
+    
+    if not row:
+        return None, None
+    user = {
+        'id': row[0],
+        'email': row[1],
+        'name': row[2],
+        'company': row[3],
+        'is_admin': bool(row[4]) if row[4] is not None else False,
+        'totp_enabled': bool(row[5]) if row[5] is not None else False
+    }
+    subscription = dict(zip(sub_columns, tuple(row)[6:])) if row[6] is not None else None
+    return user, subscription
+
 def create_subscription(user_id: int, plan: str, stripe_customer_id: str, stripe_subscription_id: str):
     """Create new subscription"""
     limits = {'starter': 100, 'professional': 600, 'enterprise': 999999}
@@ -1695,6 +1873,35 @@ def get_invoice_categories(invoice_id: int):
     conn.close()
     return categories
 
+def get_invoice_categories_bulk(invoice_ids: List[int]) -> Dict[int, List[dict]]:
+    """Kategorien für viele Rechnungen auf einmal: {invoice_id: [Kategorie, ...]}.
+
+    Gleiche Zeilenform wie ``get_invoice_categories``; eine Query pro 500 IDs
+    statt einer pro Rechnung.
+    """
+    result: Dict[int, List[dict]] = {}
+    ids = list(dict.fromkeys(invoice_ids))
+    if not ids:
+        return result
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f'''
+                SELECT ic.invoice_id AS _invoice_id, c.*, ic.confidence, ic.assigned_by
+                FROM categories c
+                JOIN invoice_categories ic ON c.id = ic.category_id
+                WHERE ic.invoice_id IN ({placeholders})
+            ''', chunk)
+            for row in cursor.fetchall():
+                category = dict(row)
+                result.setdefault(category.pop("_invoice_id"), []).append(category)
+    finally:
+        conn.close()
+    return result
+
 def save_category_learning(supplier_name: str, category_id: int, invoice_text: str, user_id: int = None):
     """Save learning data for future predictions"""
     conn = get_connection()
@@ -1802,6 +2009,27 @@ def get_invoices_by_job(job_id: str) -> List[Dict]:
     invoices = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return invoices
+
+
+def get_aussteller_stats_by_job(job_id: str) -> List[Dict]:
+    """Rechnungsanzahl + Bruttosumme je Aussteller eines Jobs, nach Summe absteigend."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COALESCE(rechnungsaussteller, 'Unbekannt') AS name,
+                   COUNT(*) AS count,
+                   SUM(COALESCE(betrag_brutto, 0)) AS total
+            FROM invoices
+            WHERE job_id = ?
+            GROUP BY 1
+            ORDER BY total DESC, MIN(id)
+        ''', (job_id,))
+        return [{"name": row[0], "count": row[1], "total": row[2]} for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
 def get_invoices_for_job(job_id: str):
     """Alias für get_invoices_by_job (Kompatibilität)."""
     return get_invoices_by_job(job_id)
@@ -64,6 +64,15 @@ def _ensure_column(cursor, table: str, column: str, ddl: str) -> None:
         logger.warning("enterprise_db: Spalte %s.%s konnte nicht ergänzt werden: %s", table, column, exc)
 
 
+def _index_count(cursor) -> int:
+    """Anzahl der Indizes in der SQLite-DB (-1, falls nicht ermittelbar)."""
+    try:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'")
+        return cursor.fetchone()[0]
+    except Exception:  # pragma: no cover - defensive (kein SQLite)
+        return -1
+
+
 def init_enterprise_schema() -> None:
     """Legt alle Enterprise-Tabellen an und ergänzt benötigte Spalten.
 
@@ -71,6 +80,7 @@ def init_enterprise_schema() -> None:
     """
     conn = get_connection()
     cursor = conn.cursor()
+    indexes_before = _index_count(cursor)
 
     # --- Phase 4b: Freigabe-Workflow -------------------------------------
     cursor.execute(
@@ -201,6 +211,7 @@ def init_enterprise_schema() -> None:
     # frischen DB (CI/Tests) funktionieren.
     # Tenant-Isolation der Hauptanwendung hängt an jobs.user_id
     _ensure_column(cursor, "jobs", "user_id", "INTEGER")
+    _ensure_column(cursor, "jobs", "status", "TEXT DEFAULT 'uploaded'")
     _ensure_column(cursor, "invoices", "tenant_id", "INTEGER")
     _ensure_column(cursor, "invoices", "status", "TEXT")
     _ensure_column(cursor, "invoices", "created_at", "TEXT")
@@ -242,6 +253,41 @@ def init_enterprise_schema() -> None:
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS ix_invoices_content_hash ON invoices(content_hash)"
     )
+    # Alle Rechnungs-Lookups pro Job (Detailseite, Exporte, Aussteller-GROUP BY)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_invoices_job_id ON invoices(job_id)"
+    )
+    # Letzte Jobs pro User+Status (Kontierungs-Seite): Range-Scan, ORDER BY
+    # created_at DESC kommt direkt aus der Indexreihenfolge – kein Temp-B-Tree.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_jobs_user_status_created ON jobs(user_id, status, created_at DESC)"
+    )
+
+    # Kosten-Analytics: letzte Jobs eines Users (ORDER BY created_at DESC LIMIT n)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_jobs_user_created ON jobs(user_id, created_at DESC)"
+    )
+
+    # Plausibilitätsprüfungen (von plausibility.py genutzt, bislang nur auf Prod
+    # angelegt – hier idempotent nachgezogen) + Join-Index für die Job-Detailseite
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plausibility_checks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER,
+            check_type TEXT,
+            severity TEXT,
+            confidence REAL,
+            details TEXT,
+            status TEXT DEFAULT 'pending',
+            reviewed_at TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_plausibility_checks_invoice ON plausibility_checks(invoice_id)"
+    )
 
     # Duplikat-Erkennung (von duplicate_detection.py genutzt, bislang ohne
     # Migration → auf Prod manuell angelegt; hier idempotent nachgezogen).
@@ -352,6 +398,134 @@ def init_enterprise_schema() -> None:
         """
     )
 
+    # Multi-Tenancy (von organizations.py genutzt; bislang nur auf Prod angelegt)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS organizations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            slug TEXT UNIQUE NOT NULL,
+            plan TEXT DEFAULT 'free',
+            max_users INTEGER DEFAULT 5,
+            max_invoices_month INTEGER DEFAULT 100,
+            settings TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS org_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            org_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            role TEXT DEFAULT 'member',
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(org_id, user_id)
+        )
+        """
+    )
+    # Covering-Index für check_permission / Org-Listen: (user_id, org_id) →
+    # role wird direkt aus dem Index gelesen, ohne Zugriff auf die Tabelle.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_members_user_org_role ON org_members(user_id, org_id, role)"
+    )
+
+    # Kategorien + Zuordnung zu Rechnungen (von database.py genutzt; bislang
+    # nur auf Prod angelegt – hier idempotent nachgezogen).
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            account_number TEXT,
+            color TEXT,
+            icon TEXT,
+            user_id INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS invoice_categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            confidence REAL DEFAULT 1.0,
+            assigned_by TEXT DEFAULT 'user',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(invoice_id, category_id)
+        )
+        """
+    )
+    # Bulk-Lookup der Job-Detailseite (WHERE invoice_id IN (...))
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_invoice_categories_invoice ON invoice_categories(invoice_id)"
+    )
+
+    # Bereits verarbeitete Stripe-Checkout-Sessions: macht /checkout/success
+    # idempotent (Reloads legen keine doppelten Abos an, kein Stripe-Abruf mehr).
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS processed_checkout_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            processed_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    # Dashboard-Widgets (von dashboard_widgets.py genutzt; bislang nur auf Prod angelegt)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_widgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            widget_type TEXT NOT NULL,
+            position INTEGER DEFAULT 0,
+            size TEXT DEFAULT 'medium',
+            config TEXT,
+            is_visible INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    # Widget-Liste pro User (WHERE user_id ORDER BY position) ohne Sortierschritt;
+    # Einzel-Lookups (id, user_id) laufen über den Primärschlüssel.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_dashboard_widgets_user_position ON dashboard_widgets(user_id, position)"
+    )
+
+    # Audit-Log (von audit.py / /api/audit-log genutzt; bislang nur auf Prod angelegt)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+            user_id INTEGER,
+            user_email TEXT,
+            action TEXT,
+            resource_type TEXT,
+            resource_id TEXT,
+            details TEXT,
+            ip_address TEXT,
+            user_agent TEXT
+        )
+        """
+    )
+    # Covering-Index für die Audit-Log-Kennzahlen: die bedingten Zählungen
+    # (user_id, timestamp, action) laufen als Index-Scan ohne Tabellenzugriff.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_audit_log_user_ts_action ON audit_log(user_id, timestamp, action)"
+    )
+
+    # Neue Indizes → Statistiken einmalig auffrischen, damit der Planer sie nutzt
+    if indexes_before >= 0 and _index_count(cursor) > indexes_before:
+        cursor.execute("ANALYZE")
+
     conn.commit()
     conn.close()
 
@@ -7,7 +7,8 @@ Verwaltet Mandanten und Benutzer-Zuordnungen.
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
 from database import get_connection
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,29 @@ class OrgRole:
     VIEWER = "viewer"
 
 
+class RoleRank(IntEnum):
+    """Rang-Ordnung der Rollen – Vergleich ist ein reiner Integer-Vergleich."""
+    VIEWER = 0
+    MEMBER = 1
+    ADMIN = 2
+    OWNER = 3
+
+
+# Einmal beim Import aufgebaut: Rollenname (wie in org_members gespeichert) → Rang
+_ROLE_RANK: Dict[str, RoleRank] = {
+    OrgRole.VIEWER: RoleRank.VIEWER,
+    OrgRole.MEMBER: RoleRank.MEMBER,
+    OrgRole.ADMIN: RoleRank.ADMIN,
+    OrgRole.OWNER: RoleRank.OWNER,
+}
+_role_rank_get = _ROLE_RANK.get
+
+
+def _role_rank(role: str) -> RoleRank:
+    """Rang einer Rolle; unbekannte Rollen zählen wie VIEWER."""
+    return _role_rank_get(role, RoleRank.VIEWER)
+
+
 def create_organization(name: str, owner_user_id: int, plan: str = "free") -> Dict:
     """Erstellt eine neue Organisation."""
     import re
@@ -100,6 +124,40 @@ def get_user_organizations(user_id: int) -> List[Dict]:
     return orgs
 
 
+def get_user_organizations_with_current(user_id: int) -> Tuple[List[Dict], Optional[Dict]]:
+    """Holt alle Organisationen eines Users inkl. aktueller Org in EINER Query.
+
+    Liefert ``(orgs, current)`` in derselben Form wie
+    ``get_user_organizations`` + ``get_current_org``.
+    """
+    conn = get_connection()
+    conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT o.*, om.role, (u.current_org_id = o.id) AS is_current
+        FROM organizations o
+        JOIN org_members om ON o.id = om.org_id
+        JOIN users u ON u.id = om.user_id
+        WHERE om.user_id = ?
+        ORDER BY o.name
+    """, (user_id,))
+    
+    rows = cursor.fetchall()
+    conn.close()
+    
+    orgs = []
+    current = None
+    for row in rows:
+        is_current = row.pop("is_current")
+        orgs.append(row)
+        if is_current and current is None:
+            current = {k: v for k, v in row.items() if k != "role"}
+            current["user_role"] = row["role"]
+    
+    return orgs, current
+
+
 def add_member(org_id: int, user_id: int, role: str = OrgRole.MEMBER) -> bool:
     """Fügt Mitglied zur Organisation hinzu."""
     conn = get_connection()
@@ -223,13 +281,6 @@ def get_current_org(user_id: int) -> Optional[Dict]:
 
 def check_permission(user_id: int, org_id: int, required_role: str = OrgRole.MEMBER) -> bool:
     """Prüft ob User die erforderliche Rolle hat."""
-    role_hierarchy = {
-        OrgRole.VIEWER: 0,
-        OrgRole.MEMBER: 1,
-        OrgRole.ADMIN: 2,
-        OrgRole.OWNER: 3
-    }
-    
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -243,35 +294,27 @@ def check_permission(user_id: int, org_id: int, required_role: str = OrgRole.MEM
     if not row:
         return False
     
-    user_role = row[0]
-    return role_hierarchy.get(user_role, 0) >= role_hierarchy.get(required_role, 0)
+    return _role_rank(row[0]) >= _role_rank(required_role)
 
 
 def get_org_stats(org_id: int) -> Dict:
-    """Holt Statistiken einer Organisation."""
+    """Holt Statistiken einer Organisation (eine Query statt drei)."""
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Mitglieder zählen
-    cursor.execute("SELECT COUNT(*) FROM org_members WHERE org_id = ?", (org_id,))
-    member_count = cursor.fetchone()[0]
-    
-    # Jobs zählen (wenn org_id in jobs existiert)
-    cursor.execute("""
-        SELECT COUNT(*) FROM jobs j
-        JOIN org_members om ON j.user_id = om.user_id
-        WHERE om.org_id = ?
-    """, (org_id,))
-    job_count = cursor.fetchone()[0]
-    
-    # Rechnungen zählen
+    # Mitglieder, Jobs und Rechnungen der Org-Mitglieder in einem Roundtrip
     cursor.execute("""
-        SELECT COUNT(*) FROM invoices i
-        JOIN jobs j ON i.job_id = j.job_id
-        JOIN org_members om ON j.user_id = om.user_id
-        WHERE om.org_id = ?
-    """, (org_id,))
-    invoice_count = cursor.fetchone()[0]
+        SELECT
+            (SELECT COUNT(*) FROM org_members WHERE org_id = ?),
+            (SELECT COUNT(*) FROM jobs j
+             JOIN org_members om ON j.user_id = om.user_id
+             WHERE om.org_id = ?),
+            (SELECT COUNT(*) FROM invoices i
+             JOIN jobs j ON i.job_id = j.job_id
+             JOIN org_members om ON j.user_id = om.user_id
+             WHERE om.org_id = ?)
+    """, (org_id, org_id, org_id))
+    member_count, job_count, invoice_count = cursor.fetchone()
     
     conn.close()
     
@@ -81,6 +81,7 @@ RATE_LIMITS = {
     "upload": (10, 60),       # 10 Uploads/Minute
     "auth": (5, 60),          # 5 Login-Versuche/Minute
     "export": (20, 60),       # 20 Exports/Minute
+    "password_reset": (20, 60),  # 20 Reset-Link-Aufrufe/Minute
 }
 
 
@@ -6,12 +6,16 @@ Automatische Berichte per Email (täglich, wöchentlich, monatlich).
 
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from database import get_connection
 
 logger = logging.getLogger(__name__)
 
+# Parallel versendete Berichte pro Cron-Lauf (begrenzt SendGrid-/DB-Last)
+REPORT_WORKERS = 4
+
 
 class ReportType:
     SUMMARY = "summary"           # Zusammenfassung
@@ -97,23 +101,34 @@ def _calculate_next_run(schedule: str, from_time: datetime = None) -> datetime:
     return run_time
 
 
+def _fetch_reports(cursor) -> List[Dict]:
+    """Materialisiert alle Zeilen einer Report-Query in einem Durchgang.
+
+    Spaltennamen werden einmal pro Query (statt pro Zeile) ermittelt, die
+    JSON-Spalten ``recipients``/``filters`` direkt beim Aufbau dekodiert.
+    """
+    cols = [col[0] for col in cursor.description]
+    reports = []
+    for row in cursor.fetchall():
+        r = dict(zip(cols, row))
+        r['recipients'] = json.loads(r['recipients']) if r['recipients'] else []
+        r['filters'] = json.loads(r['filters']) if r['filters'] else {}
+        reports.append(r)
+    return reports
+
+
 def get_user_reports(user_id: int) -> List[Dict]:
     """Holt alle geplanten Berichte eines Users."""
     conn = get_connection()
-    conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
     cursor = conn.cursor()
     
     cursor.execute("""
         SELECT * FROM scheduled_reports WHERE user_id = ? ORDER BY created_at DESC
     """, (user_id,))
     
-    reports = cursor.fetchall()
+    reports = _fetch_reports(cursor)
     conn.close()
     
-    for r in reports:
-        r['recipients'] = json.loads(r['recipients']) if r['recipients'] else []
-        r['filters'] = json.loads(r['filters']) if r['filters'] else {}
-    
     return reports
 
 
@@ -152,7 +167,6 @@ def toggle_report(report_id: int, user_id: int, active: bool) -> bool:
 def get_due_reports() -> List[Dict]:
     """Holt alle Berichte die ausgeführt werden müssen."""
     conn = get_connection()
-    conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -160,26 +174,28 @@ def get_due_reports() -> List[Dict]:
         WHERE is_active = 1 AND next_run <= ?
     """, (datetime.now().isoformat(),))
     
-    reports = cursor.fetchall()
+    reports = _fetch_reports(cursor)
     conn.close()
     
-    for r in reports:
-        r['recipients'] = json.loads(r['recipients']) if r['recipients'] else []
-        r['filters'] = json.loads(r['filters']) if r['filters'] else {}
-    
     return reports
 
 
-def mark_report_run(report_id: int):
-    """Markiert Bericht als ausgeführt und berechnet nächsten Termin."""
+def mark_report_run(report_id: int, schedule: Optional[str] = None):
+    """Markiert Bericht als ausgeführt und berechnet nächsten Termin.
+
+    Ist ``schedule`` bereits bekannt (z. B. aus ``get_due_reports``), entfällt
+    die zusätzliche Lese-Query.
+    """
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT schedule FROM scheduled_reports WHERE id = ?", (report_id,))
-    row = cursor.fetchone()
+    if schedule is None:
+        cursor.execute("SELECT schedule FROM scheduled_reports WHERE id = ?", (report_id,))
+        row = cursor.fetchone()
+        schedule = row[0] if row else None
     
-    if row:
-        next_run = _calculate_next_run(row[0])
+    if schedule:
+        next_run = _calculate_next_run(schedule)
         cursor.execute("""
             UPDATE scheduled_reports 
             SET last_run = ?, next_run = ? 
@@ -338,19 +354,33 @@ def send_report_email(report: Dict, content: Dict):
         return False
 
 
-def run_scheduled_reports():
-    """Führt alle fälligen Berichte aus (Cronjob)."""
+def _run_report(report: Dict):
+    """Erzeugt, versendet und markiert einen einzelnen fälligen Bericht."""
+    content = generate_report_content(report, report['user_id'])
+    send_report_email(report, content)
+    mark_report_run(report['id'], report.get('schedule'))
+
+
+def run_scheduled_reports(max_workers: int = REPORT_WORKERS):
+    """Führt alle fälligen Berichte aus (Cronjob).
+
+    Eine Sweep-Query holt alle fälligen Berichte; Erzeugung und Versand
+    (I/O-lastig: DB + SendGrid) laufen parallel in einem begrenzten Threadpool.
+    """
     reports = get_due_reports()
     logger.info(f"Führe {len(reports)} geplante Berichte aus...")
-    
-    for report in reports:
-        try:
-            content = generate_report_content(report, report['user_id'])
-            send_report_email(report, content)
-            mark_report_run(report['id'])
-            logger.info(f"Report '{report['name']}' erfolgreich gesendet")
-        except Exception as e:
-            logger.error(f"Report '{report['name']}' fehlgeschlagen: {e}")
+    if not reports:
+        return
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(reports)))) as pool:
+        futures = {pool.submit(_run_report, report): report for report in reports}
+        for future in as_completed(futures):
+            report = futures[future]
+            try:
+                future.result()
+                logger.info(f"Report '{report['name']}' erfolgreich gesendet")
+            except Exception as e:
+                logger.error(f"Report '{report['name']}' fehlgeschlagen: {e}")
 
 
 if __name__ == '__main__':
@@ -5,11 +5,11 @@ Erstellt SEPA Credit Transfer (SCT) XML für Überweisungen.
 """
 
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List
 import re
 import logging
+import os
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -22,17 +22,22 @@ _IBAN_LENGTHS = {
     "BE": 16, "LU": 20, "GB": 22, "PL": 28, "CZ": 24, "DK": 18, "SE": 24,
 }
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_IBAN_FORMAT_RE = re.compile(r'[A-Z]{2}[0-9]{2}[A-Z0-9]+')
+# ISO 7064: Buchstabe → Zahl (A=10 … Z=35) in einem str.translate-Durchlauf
+_IBAN_LETTER_DIGITS = str.maketrans({chr(c): str(c - 55) for c in range(ord("A"), ord("Z") + 1)})
+
 
 def normalize_iban(iban: str) -> str:
     """Kanonische IBAN: OHNE jegliche Whitespaces (auch Tabs/Zeilenumbrüche/NBSP),
     in Großbuchstaben. Muss überall genutzt werden, wo eine IBAN geschrieben wird
     (Validierung UND SEPA-Export), damit kein akzeptierter, aber whitespace-
     behafteter Wert ins XML gelangt (Banken lehnen das ab)."""
-    return re.sub(r"\s+", "", iban or "").replace(" ", "").upper()
+    return _WHITESPACE_RE.sub("", iban or "").upper()
 
 
 def _normalize_bic(bic: str) -> str:
-    return re.sub(r"\s+", "", bic or "").replace(" ", "").upper()
+    return _WHITESPACE_RE.sub("", bic or "").upper()
 
 
 def validate_iban(iban: str) -> bool:
@@ -40,21 +45,21 @@ def validate_iban(iban: str) -> bool:
 
     Vorgehen: Whitespaces entfernen + Großschreibung, Format prüfen, erwartete
     Landeslänge prüfen (falls bekannt), dann die ersten vier Zeichen ans Ende
-    stellen, Buchstaben in Zahlen umsetzen (A=10 … Z=35) und `int(...) % 97 == 1`
-    berechnen. Python-int ist beliebig genau – kein BigInt-Präzisionsproblem."""
+    stellen, Buchstaben per ``str.translate`` in Zahlen umsetzen (A=10 … Z=35)
+    und `int(...) % 97 == 1` berechnen. Python-int ist beliebig genau – kein
+    BigInt-Präzisionsproblem; Umsetzung und Parsen laufen komplett in C."""
     if not iban:
         return False
     iban = normalize_iban(iban)
     if len(iban) < 15 or len(iban) > 34:
         return False
-    if not re.match(r'^[A-Z]{2}[0-9]{2}[A-Z0-9]+$', iban):
+    if not _IBAN_FORMAT_RE.fullmatch(iban):
         return False
     expected = _IBAN_LENGTHS.get(iban[:2])
     if expected is not None and len(iban) != expected:
         return False
     # Mod-97 (ISO 7064): erste 4 Zeichen ans Ende, Buchstaben → Zahlen.
-    rearranged = iban[4:] + iban[:4]
-    digits = "".join(str(ord(ch) - 55) if ch.isalpha() else ch for ch in rearranged)
+    digits = (iban[4:] + iban[:4]).translate(_IBAN_LETTER_DIGITS)
     try:
         return int(digits) % 97 == 1
     except ValueError:  # pragma: no cover - durch Regex bereits ausgeschlossen
@@ -83,27 +88,30 @@ def generate_message_id() -> str:
     return f"SBS-{datetime.now().strftime('%Y%m%d%H%M%S')}-{id(datetime.now()) % 10000:04d}"
 
 
-def generate_sepa_xml(
+SEPA_NAMESPACE = "urn:iso:std:iso:20022:tech:xsd:pain.001.003.03"
+
+
+def _serialize(elem: ET.Element, level: int) -> str:
+    """Ein Element (inkl. Kinder) eingerückt auf Ebene ``level`` serialisieren."""
+    ET.indent(elem, space="  ", level=level)
+    elem.tail = None
+    return "  " * level + ET.tostring(elem, encoding="unicode") + "\n"
+
+
+def iter_sepa_xml(
     payments: List[Dict],
     debtor_name: str,
     debtor_iban: str,
     debtor_bic: str = None,
     execution_date: str = None,
     batch_booking: bool = True
-) -> str:
+) -> Iterator[str]:
     """
-    Generiert SEPA Credit Transfer XML (pain.001.003.03).
+    Wie ``generate_sepa_xml``, liefert das XML aber stückweise (Kopf, je
+    Transaktion ein Block, Abschluss) – für Streaming-Responses ohne den
+    kompletten String im Speicher.
     
-    Args:
-        payments: Liste von Zahlungen [{creditor_name, creditor_iban, amount, reference, ...}]
-        debtor_name: Name des Zahlers (Ihr Unternehmen)
-        debtor_iban: IBAN des Zahlers
-        debtor_bic: BIC des Zahlers (optional)
-        execution_date: Ausführungsdatum (YYYY-MM-DD), Standard: morgen
-        batch_booking: Sammelüberweisung (True) oder Einzelbuchungen (False)
-        
-    Returns:
-        SEPA-XML als String
+    Eingaben werden sofort geprüft (``ValueError``), nicht erst beim Iterieren.
     """
     if not payments:
         raise ValueError("Keine Zahlungen angegeben")
@@ -115,32 +123,27 @@ def generate_sepa_xml(
     if not execution_date:
         execution_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
     
-    # Namespace
-    ns = "urn:iso:std:iso:20022:tech:xsd:pain.001.003.03"
-    
-    # Root Element
-    root = ET.Element("Document", xmlns=ns)
-    cstmr_cdt_trf_initn = ET.SubElement(root, "CstmrCdtTrfInitn")
+    return _iter_sepa_chunks(payments, debtor_name, debtor_iban, debtor_bic, execution_date, batch_booking)
+
+
+def _iter_sepa_chunks(payments, debtor_name, debtor_iban, debtor_bic, execution_date, batch_booking):
+    msg_id = generate_message_id()
+    # Gesamtsumme berechnen
+    total_amount = sum(float(p.get('amount', 0)) for p in payments)
     
     # === Group Header ===
-    grp_hdr = ET.SubElement(cstmr_cdt_trf_initn, "GrpHdr")
-    
-    msg_id = generate_message_id()
+    grp_hdr = ET.Element("GrpHdr")
     ET.SubElement(grp_hdr, "MsgId").text = msg_id
     ET.SubElement(grp_hdr, "CreDtTm").text = datetime.now().isoformat()
     ET.SubElement(grp_hdr, "NbOfTxs").text = str(len(payments))
-    
-    # Gesamtsumme berechnen
-    total_amount = sum(float(p.get('amount', 0)) for p in payments)
     ET.SubElement(grp_hdr, "CtrlSum").text = f"{total_amount:.2f}"
     
     # Initiator
     initg_pty = ET.SubElement(grp_hdr, "InitgPty")
     ET.SubElement(initg_pty, "Nm").text = clean_sepa_string(debtor_name, 70)
     
-    # === Payment Information ===
-    pmt_inf = ET.SubElement(cstmr_cdt_trf_initn, "PmtInf")
-    
+    # === Payment Information (Kopfteil vor den Transaktionen) ===
+    pmt_inf = ET.Element("PmtInf")
     ET.SubElement(pmt_inf, "PmtInfId").text = f"PMT-{msg_id}"
     ET.SubElement(pmt_inf, "PmtMtd").text = "TRF"  # Transfer
     ET.SubElement(pmt_inf, "BtchBookg").text = "true" if batch_booking else "false"
@@ -174,9 +177,18 @@ def generate_sepa_xml(
     
     ET.SubElement(pmt_inf, "ChrgBr").text = "SLEV"  # Shared charges
     
+    yield (
+        '<?xml version="1.0" ?>\n'
+        f'<Document xmlns="{SEPA_NAMESPACE}">\n'
+        "  <CstmrCdtTrfInitn>\n"
+        + _serialize(grp_hdr, 2)
+        + "    <PmtInf>\n"
+        + "".join(_serialize(child, 3) for child in pmt_inf)
+    )
+    
     # === Credit Transfer Transactions ===
     for i, payment in enumerate(payments):
-        cdt_trf_tx_inf = ET.SubElement(pmt_inf, "CdtTrfTxInf")
+        cdt_trf_tx_inf = ET.Element("CdtTrfTxInf")
         
         # Payment ID
         pmt_id = ET.SubElement(cdt_trf_tx_inf, "PmtId")
@@ -212,29 +224,41 @@ def generate_sepa_xml(
         reference = payment.get('reference') or payment.get('rechnungsnummer', '')
         ustrd_text = f"Rechnung {reference}" if reference else "Zahlung"
         ET.SubElement(rmt_inf, "Ustrd").text = clean_sepa_string(ustrd_text, 140)
+        
+        yield _serialize(cdt_trf_tx_inf, 3)
     
-    # Pretty print
-    xml_string = ET.tostring(root, encoding='unicode')
-    dom = minidom.parseString(xml_string)
-    return dom.toprettyxml(indent="  ", encoding=None)
+    yield "    </PmtInf>\n  </CstmrCdtTrfInitn>\n</Document>\n"
 
 
-def export_invoices_to_sepa(
-    invoices: List[Dict],
-    debtor_config: Dict,
-    output_path: str = None
-) -> Dict:
+def generate_sepa_xml(
+    payments: List[Dict],
+    debtor_name: str,
+    debtor_iban: str,
+    debtor_bic: str = None,
+    execution_date: str = None,
+    batch_booking: bool = True
+) -> bytes:
     """
-    Exportiert Rechnungen als SEPA-XML.
+    Generiert SEPA Credit Transfer XML (pain.001.003.03).
     
     Args:
-        invoices: Rechnungen mit IBAN
-        debtor_config: {name, iban, bic}
-        output_path: Ausgabepfad (optional)
+        payments: Liste von Zahlungen [{creditor_name, creditor_iban, amount, reference, ...}]
+        debtor_name: Name des Zahlers (Ihr Unternehmen)
+        debtor_iban: IBAN des Zahlers
+        debtor_bic: BIC des Zahlers (optional)
+        execution_date: Ausführungsdatum (YYYY-MM-DD), Standard: morgen
+        batch_booking: Sammelüberweisung (True) oder Einzelbuchungen (False)
         
     Returns:
-        Dict mit path, count, total, warnings
+        SEPA-XML als UTF-8-Bytes (direkt für Datei bzw. Response-Body)
     """
+    return "".join(iter_sepa_xml(
+        payments, debtor_name, debtor_iban, debtor_bic, execution_date, batch_booking
+    )).encode('utf-8')
+
+
+def _collect_payments(invoices: List[Dict]):
+    """Rechnungen → gültige SEPA-Zahlungen + Warnungen für übersprungene."""
     warnings = []
     valid_payments = []
     
@@ -263,6 +287,34 @@ def export_invoices_to_sepa(
             'end_to_end_id': f"INV-{inv.get('rechnungsnummer', '')}"[:35]
         })
     
+    return valid_payments, warnings
+
+
+def _default_output_path() -> str:
+    output_dir = Path('output')
+    output_dir.mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return str(output_dir / f"sepa_payment_{timestamp}.xml")
+
+
+def export_invoices_to_sepa(
+    invoices: List[Dict],
+    debtor_config: Dict,
+    output_path: str = None
+) -> Dict:
+    """
+    Exportiert Rechnungen als SEPA-XML.
+    
+    Args:
+        invoices: Rechnungen mit IBAN
+        debtor_config: {name, iban, bic}
+        output_path: Ausgabepfad (optional)
+        
+    Returns:
+        Dict mit path, count, total, warnings, xml (UTF-8-Bytes)
+    """
+    valid_payments, warnings = _collect_payments(invoices)
+    
     if not valid_payments:
         return {
             'success': False,
@@ -280,12 +332,9 @@ def export_invoices_to_sepa(
     
     # Speichern
     if not output_path:
-        output_dir = Path('output')
-        output_dir.mkdir(exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_path = str(output_dir / f"sepa_payment_{timestamp}.xml")
+        output_path = _default_output_path()
     
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with open(output_path, 'wb') as f:
         f.write(xml_content)
     
     total_amount = sum(p['amount'] for p in valid_payments)
@@ -302,6 +351,66 @@ def export_invoices_to_sepa(
     }
 
 
+def stream_invoices_to_sepa(
+    invoices: List[Dict],
+    debtor_config: Dict,
+    output_path: str = None
+) -> Dict:
+    """
+    Wie ``export_invoices_to_sepa``, aber ohne das XML komplett aufzubauen.
+    
+    Statt ``xml`` enthält das Ergebnis ``chunks``: einen Iterator über die
+    UTF-8-Bytes des XML, der beim Durchlaufen gleichzeitig die Datei unter
+    ``path`` schreibt – sichtbar erst, wenn der letzte Chunk durch ist. Validierungsfehler (``success: False`` bzw.
+    ``ValueError``) kommen sofort, nicht erst beim Iterieren.
+    """
+    valid_payments, warnings = _collect_payments(invoices)
+    
+    if not valid_payments:
+        return {
+            'success': False,
+            'error': 'Keine gültigen Zahlungen',
+            'warnings': warnings
+        }
+    
+    xml_chunks = iter_sepa_xml(
+        payments=valid_payments,
+        debtor_name=debtor_config.get('name', 'Unbekannt'),
+        debtor_iban=debtor_config.get('iban', ''),
+        debtor_bic=debtor_config.get('bic', '')
+    )
+    
+    if not output_path:
+        output_path = _default_output_path()
+    
+    total_amount = sum(p['amount'] for p in valid_payments)
+    
+    def _write_through():
+        # Erst <path>.tmp, nach dem letzten Chunk os.replace: bricht der Client ab
+        # oder wirft ein Chunk, bleibt keine abgeschnittene Zahlungsdatei liegen
+        tmp_path = f"{output_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in xml_chunks:
+                    data = chunk.encode('utf-8')
+                    f.write(data)
+                    yield data
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info(f"SEPA-XML erstellt: {output_path} ({len(valid_payments)} Zahlungen, {total_amount:.2f} EUR)")
+    
+    return {
+        'success': True,
+        'path': output_path,
+        'count': len(valid_payments),
+        'total': round(total_amount, 2),
+        'warnings': warnings,
+        'chunks': _write_through()
+    }
+
+
 def validate_sepa_file(xml_path: str) -> Dict:
     """Validiert eine SEPA-XML Datei."""
     try:
@@ -0,0 +1,95 @@
+"""Tests für die Auto-Kontierung (Kontenvorschlag-Cache)."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auto_accounting  # noqa: E402
+
+
+def _fake_llm(calls, method="llm"):
+    def _suggest(invoice_data, skr="SKR03"):
+        calls.append(invoice_data.get("rechnungsaussteller"))
+        return {"suggested": {"account": "4900", "name": "Sonstige Aufwendungen", "confidence": 0.75},
+                "alternatives": [], "skr": skr, "method": method}
+    return _suggest
+
+
+def test_identical_invoice_data_hits_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(auto_accounting, "suggest_account_with_llm", _fake_llm(calls))
+    monkeypatch.setattr(auto_accounting, "_llm_suggest_cache", {})
+    data = {"rechnungsaussteller": "ACME GmbH", "betrag_brutto": 119.0}
+
+    first = auto_accounting.suggest_account_cached(data, "SKR03")
+    first["invoice"] = "R-1"  # Aufrufer-Mutation darf den Cache nicht verändern
+    second = auto_accounting.suggest_account_cached(dict(reversed(list(data.items()))), "SKR03")
+    auto_accounting.suggest_account_cached(data, "SKR04")
+
+    assert calls == ["ACME GmbH", "ACME GmbH"]
+    assert "invoice" not in second
+
+
+def test_llm_fallback_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(auto_accounting, "suggest_account_with_llm",
+                        _fake_llm(calls, method="rule_based_fallback"))
+    monkeypatch.setattr(auto_accounting, "_llm_suggest_cache", {})
+    data = {"rechnungsaussteller": "ACME GmbH"}
+
+    auto_accounting.suggest_account_cached(data)
+    auto_accounting.suggest_account_cached(data)
+
+    assert len(calls) == 2
+
+
+def _low_confidence(invoice_data, skr="SKR03"):
+    return {"suggested": {"account": "4900", "name": "Sonstige Aufwendungen", "confidence": 0.3},
+            "alternatives": [], "skr": skr}
+
+
+def test_batch_suggest_bundles_llm_calls_and_dedupes(monkeypatch):
+    chunks = []
+
+    def _chunk(chunk, skr):
+        chunks.append([inv["rechnungsaussteller"] for inv in chunk])
+        return {i: {"account": f"48{i:02d}", "name": "Konto", "reason": ""}
+                for i, inv in enumerate(chunk) if inv["rechnungsaussteller"] != "Kaputt"}
+
+    monkeypatch.setattr(auto_accounting, "suggest_account", _low_confidence)
+    monkeypatch.setattr(auto_accounting, "_llm_suggest_chunk", _chunk)
+    monkeypatch.setattr(auto_accounting, "_llm_suggest_cache", {})
+    monkeypatch.setattr(auto_accounting, "LLM_BATCH_SIZE", 3)
+    suppliers = ["A", "B", "A", "C", "Kaputt", "D", "B"]
+    invoices = [{"rechnungsnummer": f"R-{s}", "rechnungsaussteller": s} for s in suppliers]
+
+    results = auto_accounting.batch_suggest_accounts(invoices)
+
+    assert sorted(map(len, chunks)) == [2, 3]
+    assert sorted(s for c in chunks for s in c) == ["A", "B", "C", "D", "Kaputt"]
+    assert [r["invoice"] for r in results] == [f"R-{s}" for s in suppliers]
+    assert results[0]["suggested"] == results[2]["suggested"]
+    assert results[4]["method"] == "rule_based_fallback"
+    assert {r["method"] for i, r in enumerate(results) if i != 4} == {"llm"}
+
+    # Zweiter Lauf: alles außer dem Fallback kommt aus dem Cache
+    chunks.clear()
+    auto_accounting.batch_suggest_accounts(invoices)
+    assert chunks == [["Kaputt"]]
+
+
+def test_batch_suggest_respects_cache_size(monkeypatch):
+    def _chunk(chunk, skr):
+        return {i: {"account": "4800", "name": "Konto", "reason": ""} for i in range(len(chunk))}
+
+    monkeypatch.setattr(auto_accounting, "suggest_account", _low_confidence)
+    monkeypatch.setattr(auto_accounting, "_llm_suggest_chunk", _chunk)
+    monkeypatch.setattr(auto_accounting, "_llm_suggest_cache", {})
+    monkeypatch.setattr(auto_accounting, "LLM_SUGGEST_CACHE_SIZE", 3)
+
+    auto_accounting.batch_suggest_accounts(
+        [{"rechnungsnummer": f"R-{n}", "rechnungsaussteller": f"S{n}"} for n in range(5)]
+    )
+
+    assert len(auto_accounting._llm_suggest_cache) == 3
@@ -0,0 +1,59 @@
+"""Tests für die Dashboard-Widgets (Einzel-Lookup, Bulk-Daten)."""
+
+import dashboard_widgets
+from dashboard_widgets import WidgetType
+
+
+def test_get_widget_by_id_scoped_to_user_and_visible(db):
+    own = dashboard_widgets.add_widget(1, WidgetType.TOP_SUPPLIERS, config={"days": 7})
+    hidden = dashboard_widgets.add_widget(1, WidgetType.ALERTS)
+    dashboard_widgets.remove_widget(hidden["id"], 1)
+
+    widget = dashboard_widgets.get_widget_by_id(own["id"], 1)
+
+    assert widget["widget_type"] == WidgetType.TOP_SUPPLIERS
+    assert widget["config"] == {"days": 7}
+    assert dashboard_widgets.get_widget_by_id(own["id"], 2) is None
+    assert dashboard_widgets.get_widget_by_id(hidden["id"], 1) is None
+
+
+def test_get_widget_by_id_matches_widget_list(db):
+    dashboard_widgets.get_user_widgets(1)  # legt Standard-Widgets an
+    for w in dashboard_widgets.get_user_widgets(1):
+        assert dashboard_widgets.get_widget_by_id(w["id"], 1) == w
+
+
+def test_widget_data_cached_reuses_result_until_ttl(db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(dashboard_widgets, "_widget_data_cache", {})
+    monkeypatch.setattr(dashboard_widgets, "get_widget_data",
+                        lambda widget_type, user_id, config=None: calls.append(widget_type) or {"type": widget_type})
+
+    first = dashboard_widgets.get_widget_data_cached(WidgetType.ALERTS, 1, {"days": 7})
+    second = dashboard_widgets.get_widget_data_cached(WidgetType.ALERTS, 1, {"days": 7})
+    dashboard_widgets.get_widget_data_cached(WidgetType.ALERTS, 2, {"days": 7})
+    assert first == second == {"type": WidgetType.ALERTS}
+    assert len(calls) == 2
+
+    monkeypatch.setattr(dashboard_widgets, "WIDGET_DATA_TTL", -1)
+    dashboard_widgets._widget_data_cache.clear()
+    dashboard_widgets.get_widget_data_cached(WidgetType.ALERTS, 1, {"days": 7})
+    dashboard_widgets.get_widget_data_cached(WidgetType.ALERTS, 1, {"days": 7})
+    assert len(calls) == 4
+
+
+def test_recent_jobs_widget_reads_existing_job_columns(db):
+    conn = dashboard_widgets.get_connection()
+    conn.execute("ALTER TABLE jobs ADD COLUMN upload_path TEXT")
+    conn.execute("ALTER TABLE jobs ADD COLUMN total_files INTEGER")
+    conn.execute(
+        "INSERT INTO jobs (job_id, user_id, created_at, status, upload_path, total_files) "
+        "VALUES ('j1', 1, '2026-10-01T10:00:00', 'completed', 'rechnungen.zip', 3)"
+    )
+    conn.commit()
+    conn.close()
+
+    data = dashboard_widgets.get_widget_data(WidgetType.RECENT_JOBS, 1)
+
+    assert data["jobs"] == [{"job_id": "j1", "filename": "rechnungen.zip", "status": "completed",
+                             "created_at": "2026-10-01T10:00:00", "invoice_count": 3}]
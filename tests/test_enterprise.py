@@ -1,6 +1,7 @@
 """Tests für die Enterprise-Features Phase 4 (UI) + Phase 5 (GoBD/Audit/DSGVO)."""
 
 import json
+import sqlite3
 from datetime import datetime, timedelta
 
 import pytest
@@ -34,6 +35,244 @@ def test_retention_policy_default_and_set(db):
     assert get_retention_years(1) == 6
 
 
+def test_org_members_auth_lookup_uses_covering_index(db):
+    conn = database.get_connection()
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT org_id, role FROM org_members WHERE user_id = ?", (1,)
+    ).fetchall()
+    conn.close()
+    assert "COVERING INDEX ix_org_members_user_org_role" in " ".join(str(row[3]) for row in plan)
+
+
+def test_invoice_categories_bulk_groups_by_invoice(db):
+    conn = database.get_connection()
+    conn.executemany("INSERT INTO categories (id, name, color) VALUES (?, ?, ?)",
+                     [(1, "Miete", "#111"), (2, "Reisen", "#222")])
+    conn.executemany(
+        "INSERT INTO invoice_categories (invoice_id, category_id, confidence, assigned_by) VALUES (?, ?, ?, ?)",
+        [(10, 1, 0.9, "ai"), (10, 2, 1.0, "user"), (11, 2, 0.5, "ai")],
+    )
+    conn.commit()
+    conn.close()
+
+    cats = database.get_invoice_categories_bulk([10, 11, 12, 10])
+
+    assert sorted(c["name"] for c in cats[10]) == ["Miete", "Reisen"]
+    assert [(c["id"], c["confidence"], c["assigned_by"]) for c in cats[11]] == [(2, 0.5, "ai")]
+    assert 12 not in cats
+    assert "_invoice_id" not in cats[10][0]
+    assert database.get_invoice_categories_bulk([]) == {}
+
+
+def test_connections_use_wal_and_normal_sync(db):
+    conn = database.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    conn.close()
+
+
+def test_get_db_reuses_pooled_connection_and_rolls_back(db):
+    gen = database.get_db()
+    first = next(gen)
+    first.execute("INSERT INTO jobs (job_id, user_id) VALUES ('uncommitted', 1)")
+    gen.close()  # Request-Ende ohne commit
+
+    gen = database.get_db()
+    second = next(gen)
+    assert second is first
+    assert second.execute("SELECT COUNT(*) FROM jobs WHERE job_id = 'uncommitted'").fetchone()[0] == 0
+    assert second.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    gen.close()
+
+def test_readonly_db_is_pooled_and_rejects_writes(db):
+    gen = database.get_readonly_db()
+    first = next(gen)
+    assert first.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert first.execute("PRAGMA mmap_size").fetchone()[0] == database.SQLITE_RO_MMAP_SIZE
+    with pytest.raises(sqlite3.OperationalError):
+        first.execute("INSERT INTO jobs (job_id, user_id) VALUES ('ro', 1)")
+    gen.close()
+
+    writer = database.get_connection()
+    writer.execute("INSERT INTO jobs (job_id, user_id) VALUES ('committed', 1)")
+    writer.commit()
+    writer.close()
+
+    gen = database.get_readonly_db()
+    second = next(gen)
+    assert second is first
+    assert second.execute("SELECT COUNT(*) FROM jobs WHERE job_id = 'committed'").fetchone()[0] == 1
+    gen.close()
+
+
+def test_aussteller_stats_grouped_in_sql(db):
+    conn = database.get_connection()
+    conn.executemany(
+        "INSERT INTO invoices (job_id, rechnungsaussteller, betrag_brutto) VALUES (?, ?, ?)",
+        [("j1", "ACME", 100.0), ("j1", "Beta", 50.0), ("j1", "ACME", 25.0),
+         ("j1", None, None), ("j2", "Beta", 999.0)],
+    )
+    conn.commit()
+    plan = " ".join(str(row[3]) for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM invoices WHERE job_id = ?", ("j1",)
+    ).fetchall())
+    conn.close()
+
+    assert database.get_aussteller_stats_by_job("j1") == [
+        {"name": "ACME", "count": 2, "total": 125.0},
+        {"name": "Beta", "count": 1, "total": 50.0},
+        {"name": "Unbekannt", "count": 1, "total": 0},
+    ]
+    assert "ix_invoices_job_id" in plan
+
+
+def test_recent_completed_jobs_use_index_order(db):
+    conn = database.get_connection()
+    plan = " ".join(str(row[3]) for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT job_id, created_at FROM jobs "
+        "WHERE user_id = ? AND status = 'completed' ORDER BY created_at DESC LIMIT 20", (1,)
+    ).fetchall())
+    conn.close()
+    assert "USING INDEX ix_jobs_user_status_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+
+def test_hot_join_columns_are_indexed_and_analyzed(db):
+    conn = database.get_connection()
+
+    def plan(sql, *params):
+        return " ".join(str(row[3]) for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall())
+
+    jobs_plan = plan("SELECT job_id FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT 50", 1)
+    checks_plan = plan(
+        "SELECT pc.id FROM plausibility_checks pc JOIN invoices i ON pc.invoice_id = i.id WHERE i.job_id = ?", "j1"
+    )
+    analyzed = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0]
+    conn.close()
+
+    assert "ix_jobs_user_created" in jobs_plan and "TEMP B-TREE" not in jobs_plan
+    assert "ix_invoices_job_id" in checks_plan and "ix_plausibility_checks_invoice" in checks_plan
+    assert analyzed == 1
+
+
+def test_audit_log_stats_use_covering_index(db):
+    conn = database.get_connection()
+    plan = " ".join(
+        str(row[3])
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(CASE WHEN action = 'auth.login' THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN DATE(timestamp) = DATE('now') THEN 1 ELSE 0 END) FROM audit_log WHERE user_id = ?",
+            (1,),
+        ).fetchall()
+    )
+    conn.close()
+
+    assert "COVERING INDEX ix_audit_log_user_ts_action" in plan
+
+
+def test_audit_log_events_are_batched(db, monkeypatch):
+    import threading
+    import audit
+
+    monkeypatch.setattr(audit, "_ensure_flusher", lambda: None)
+    monkeypatch.setattr(audit, "_audit_pending", threading.Event())
+    monkeypatch.setattr(audit, "AUDIT_BATCH_SIZE", 2)
+    opened = []
+    real_get_connection = audit.get_connection
+    monkeypatch.setattr(audit, "get_connection", lambda: opened.append(1) or real_get_connection())
+    audit.flush_audit_log()
+    opened.clear()
+
+    for n in range(5):
+        audit.log_audit(audit.AuditAction.LOGIN, user_id=n)
+    assert opened == []  # Loggen blockiert nicht auf der DB
+
+    assert audit.flush_audit_log() == 5
+    assert len(opened) == 3  # 5 Events in Batches à 2
+    logs = audit.get_audit_logs(limit=10)
+    assert sorted(row["user_id"] for row in logs) == [0, 1, 2, 3, 4]
+    assert all(row["timestamp"] for row in logs)
+
+
+def test_audit_log_flush_failure_keeps_events(db, monkeypatch):
+    import threading
+    import audit
+
+    monkeypatch.setattr(audit, "_ensure_flusher", lambda: None)
+    monkeypatch.setattr(audit, "_audit_pending", threading.Event())
+    monkeypatch.setattr(audit, "AUDIT_RETRY_DELAY", 0)
+    audit.flush_audit_log()
+
+    # Batch scheitert (nicht bindbarer Wert) → zeilenweise: nur das kaputte Event fehlt
+    audit.log_audit(audit.AuditAction.LOGIN, user_id=1)
+    audit.log_audit(audit.AuditAction.LOGIN, user_id=2, details={"kein": "str"})
+    audit.log_audit(audit.AuditAction.LOGIN, user_id=3)
+    assert audit.flush_audit_log() == 2
+    assert sorted(row["user_id"] for row in audit.get_audit_logs(limit=10)) == [1, 3]
+
+    # DB gesperrt → nichts verworfen, Events zurück in die Queue und Flusher geweckt
+    real_get_connection = audit.get_connection
+
+    def _locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(audit, "get_connection", _locked)
+    audit.log_audit(audit.AuditAction.LOGOUT, user_id=4)
+    audit.log_audit(audit.AuditAction.LOGOUT, user_id=5)
+    audit._audit_pending.clear()
+    assert audit.flush_audit_log() == 0
+    assert audit._audit_queue.qsize() == 2 and audit._audit_pending.is_set()
+
+    monkeypatch.setattr(audit, "get_connection", real_get_connection)
+    assert audit.flush_audit_log() == 2
+    assert sorted(row["user_id"] for row in audit.get_audit_logs(limit=10)) == [1, 3, 4, 5]
+
+
+def test_audit_log_permanent_error_is_dropped_without_backoff(db, monkeypatch):
+    import threading
+    import time
+    import audit
+
+    monkeypatch.setattr(audit, "_ensure_flusher", lambda: None)
+    monkeypatch.setattr(audit, "_audit_pending", threading.Event())
+    audit.flush_audit_log()
+    conn = database.get_connection()
+    conn.execute("ALTER TABLE audit_log DROP COLUMN user_agent")  # Schema passt nicht mehr
+    conn.commit()
+    conn.close()
+
+    audit.log_audit(audit.AuditAction.LOGIN, user_id=1)
+    audit._audit_pending.clear()
+    started = time.monotonic()
+    assert audit.flush_audit_log() == 0
+
+    assert time.monotonic() - started < audit.AUDIT_RETRY_DELAY  # kein Backoff
+    assert audit._audit_queue.qsize() == 0 and not audit._audit_pending.is_set()
+    assert not audit._is_transient(sqlite3.OperationalError("no such table: audit_log"))
+    assert audit._is_transient(sqlite3.OperationalError("database is locked"))
+
+
+def test_cost_totals_aggregated_in_sql(db):
+    import cost_tracker
+    conn = database.get_connection()
+    conn.execute("ALTER TABLE jobs ADD COLUMN total_files INTEGER")
+    conn.executemany(
+        "INSERT INTO jobs (job_id, user_id, total_files) VALUES (?, ?, ?)",
+        [("j1", 1, 3), ("j2", 1, None), ("j3", 1, 5), ("j4", 2, 100)],
+    )
+    conn.commit()
+    conn.close()
+
+    assert cost_tracker.get_cost_totals(1) == {"total_cost": 0, "total_invoices": 8, "avg_cost_per_invoice": 0}
+
+    cost_tracker.track_api_cost("j1", None, "gpt-4o", 1_000_000, 0, 1.0)
+    cost_tracker.track_api_cost("j3", None, "gpt-4o", 0, 100_000, 1.0)
+    totals = cost_tracker.get_cost_totals(1)
+    assert totals["total_cost"] == pytest.approx(sum(m["total_cost"] for m in cost_tracker.get_monthly_costs()))
+    assert totals["avg_cost_per_invoice"] == pytest.approx(3.5 / 8)
+    assert cost_tracker.get_cost_totals(99)["avg_cost_per_invoice"] == 0
+
 # ---------------------------------------------------------------------------
 # Phase 4c – Lieferanten-Übersicht
 # ---------------------------------------------------------------------------
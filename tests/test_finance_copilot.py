@@ -0,0 +1,143 @@
+"""Tests der Finance-Copilot-Helfer (Snapshot-Normalisierung, Hash, Prompt, LLM-Batch).
+
+Reine Funktionen aus web/app.py ohne HTTP; die Endpoints prüft test_routes_smoke.py.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("ENVIRONMENT", "development")
+os.environ.setdefault("SESSION_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("JWT_SECRET", "test-secret-key")
+os.environ.setdefault("INVOICE_DB_PATH", os.path.join(tempfile.mkdtemp(), "finance_copilot.db"))
+
+web_app = pytest.importorskip("web.app", reason="App-Abhängigkeiten nicht installiert")
+
+
+def test_finance_copilot_batch_runs_llm_calls_concurrently(monkeypatch):
+    """Finance Copilot: Async-Client, Batch überlappt die LLM-Aufrufe, Reihenfolge bleibt."""
+    import asyncio
+    from types import SimpleNamespace
+
+    state = {"active": 0, "peak": 0}
+
+    class FakeCompletions:
+        async def create(self, messages, **kwargs):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            question = messages[-1]["content"].split("„")[1].split("“")[0]
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f" A:{question} "))])
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(web_app, "_get_finance_copilot_client", lambda: fake)
+    monkeypatch.setattr(web_app, "_finance_copilot_cache", web_app.OrderedDict())
+
+    results = asyncio.run(web_app.run_finance_copilot_llm_batch(["Q1", "Q2", "Q3"], days=30, snapshot={}))
+
+    assert [answer for answer, _ in results] == ["A:Q1", "A:Q2", "A:Q3"]
+    assert state["peak"] == 3
+
+
+def test_finance_snapshot_key_uses_blake3_when_available(monkeypatch):
+    """Snapshot-Hash: reihenfolgeunabhängig, 128 Bit; BLAKE3 wenn installiert, sonst blake2b."""
+    import hashlib
+    snapshot = {"kpis": {"total_gross": 10.0, "total_net": 8.0}, "monthly": [{"label": "2026-01"}]}
+    reordered = {"monthly": [{"label": "2026-01"}], "kpis": {"total_net": 8.0, "total_gross": 10.0}}
+
+    monkeypatch.setattr(web_app, "blake3", None)
+    fallback = web_app._finance_snapshot_key(snapshot)
+    assert fallback == web_app._finance_snapshot_key(reordered)
+    assert len(fallback) == 32
+
+    seen = []
+
+    class _Blake3:
+        def __init__(self, data):
+            seen.append(data)
+            self._h = hashlib.blake2b(data, digest_size=16)
+
+        def hexdigest(self, length):
+            assert length == 16
+            return "b3" + self._h.hexdigest()[2:]
+
+    monkeypatch.setattr(web_app, "blake3", type("blake3", (), {"blake3": _Blake3}))
+    assert web_app._finance_snapshot_key(reordered) == "b3" + fallback[2:]
+    assert len(seen) == 1
+
+
+def test_finance_copilot_request_clamps_max_tokens_to_context(monkeypatch):
+    """User-Prompt aus Template; max_tokens passt sich dem Rest-Kontextfenster an."""
+    view = web_app._normalize_snapshot({})
+    params = web_app._finance_copilot_request("Kosten $x?", 30, "auto", view)
+    prompt = params["messages"][1]["content"]
+    assert "„Kosten $x?“" in prompt and "Spezifischer Fokus: auto" in prompt
+    assert params["max_tokens"] == web_app.FINANCE_COPILOT_MAX_TOKENS
+
+    used = (web_app._finance_system_tokens() + web_app._count_tokens(prompt)
+            + web_app.FINANCE_COPILOT_TOKEN_RESERVE)
+    monkeypatch.setattr(web_app, "FINANCE_COPILOT_CONTEXT_TOKENS", used + 100)
+    assert web_app._finance_copilot_request("Kosten $x?", 30, "auto", view)["max_tokens"] == 100
+
+    monkeypatch.setattr(web_app, "FINANCE_COPILOT_CONTEXT_TOKENS", used)
+    with pytest.raises(ValueError):
+        web_app._finance_copilot_request("Kosten $x?", 30, "auto", view)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Wie ist unsere Liquidität?", "Wie wirkt sich unser aktuelles Ausgabenniveau auf den Cash-Runway aus?"),
+    ("Top-Lieferanten?", "Wie hoch ist unser Klumpenrisiko bei den Top-Lieferanten?"),
+    ("Kostenblöcke und Ausgaben", "Welche wiederkehrenden Kosten wachsen aktuell am stärksten?"),
+])
+def test_suggest_followups_matches_keyword_substrings(question, expected):
+    """Folgefragen: Stichwort-Tabelle greift auf Teilstrings, Ergebnis ohne Dubletten, max. 6."""
+    suggestions = web_app._suggest_followups(question, web_app._normalize_snapshot({}), 30)
+    assert expected in suggestions
+    assert len(suggestions) == len(set(suggestions)) <= 6
+
+
+def test_normalize_snapshot_resolves_field_variants():
+    """Snapshot-Normalisierung: erster gesetzter Feldname gewinnt, Top-5/letzte 6 Monate."""
+    snapshot = {
+        "kpis": {"total_gross": 0, "total_brutto": 500.0, "total_mwst": 95.0, "duplicates": 2},
+        "top_vendors": [{"supplier": "ACME", "total_brutto": 200.0, "invoice_count": 3}] + [{"total": n} for n in range(6)],
+        "monthly_totals": [{"monat": f"2026-{m:02d}", "value": m} for m in range(1, 9)],
+    }
+
+    view = web_app._normalize_snapshot(snapshot)
+
+    assert view.kpis == web_app.SnapshotKpis(gross=500.0, net=0.0, vat=95.0, invoices=0, duplicates=2)
+    assert view.vendors[0] == web_app.SnapshotVendor(name="ACME", gross=200.0, count=3)
+    assert len(view.vendors) == 5 and view.vendors[1].name is None
+    assert [row.label for row in view.monthly] == [f"2026-{m:02d}" for m in range(3, 9)]
+    assert "  1. ACME: " in web_app._build_snapshot_summary(view, 30)
+    assert any("„ACME“" in q for q in web_app._suggest_followups("Lieferanten?", view, 30))
+
+
+def test_normalize_snapshot_picks_top_vendors_from_long_lists(monkeypatch):
+    """Top 5 nach Brutto: lange Listen (≥ 32) per NumPy, kurze per heapq – gleiches Ergebnis."""
+    vendors = [{"name": f"V{i}", "total_gross": float(i % 40)} for i in range(100)]
+
+    view = web_app._normalize_snapshot({"top_vendors": vendors})
+    short = web_app._normalize_snapshot({"top_vendors": vendors[:10]})
+
+    assert [(v.name, v.gross) for v in view.vendors] == [
+        ("V39", 39.0), ("V79", 39.0), ("V38", 38.0), ("V78", 38.0), ("V37", 37.0),
+    ]
+    assert [v.name for v in short.vendors] == ["V9", "V8", "V7", "V6", "V5"]
+
+    unsorted = [vendors[i] for i in (3, 39, 0, 79, 38, 12, 78, 1, 37, 77)]
+    heap_rows = web_app._top_vendor_rows(unsorted)
+    monkeypatch.setattr(web_app, "SNAPSHOT_VENDOR_VECTORIZE_MIN", 0)
+    assert web_app._top_vendor_rows(unsorted) == heap_rows
+    assert [v["name"] for v in heap_rows] == ["V39", "V79", "V38", "V78", "V37"]
+
+
+def test_normalize_snapshot_rejects_non_numeric_amounts():
+    """Nicht numerische Beträge fallen bei der Umwandlung auf statt still als 0."""
+    with pytest.raises(ValueError):
+        web_app._normalize_snapshot({"kpis": {"total_gross": "viel"}})
@@ -2,6 +2,7 @@
 
 import io
 import os
+import re
 import tempfile
 
 import pytest
@@ -326,6 +327,8 @@ def test_validation_bad_iban_flagged():
     "DE89370400440532013000",
     "DE02120300000000202051",
     "de19 1001 0123 8495 7321 07",  # Leerzeichen + Kleinschreibung
+    "GB82WEST12345698765432",       # Buchstaben in der BBAN
+    "NL91ABNA0417164300",
 ])
 def test_validate_iban_valid(iban):
     from sepa_export import validate_iban
@@ -337,6 +340,8 @@ def test_validate_iban_valid(iban):
     "DE88370400440532013000",   # falsche Prüfziffer
     "DE191001012384957321",     # falsche Länge (DE=22)
     "XX19100101238495732107",   # Nicht-Land / Mod-97 falsch
+    "GB82WEST12345698765433",   # Buchstaben-BBAN, falsche Prüfziffer
+    "DE89\u00c43704004405320130",  # Nicht-ASCII-Zeichen
     "",
 ])
 def test_validate_iban_invalid(iban):
@@ -384,12 +389,59 @@ def test_sepa_xml_emits_whitespace_free_iban():
                    "amount": 10.0, "reference": "R-1"}],
         debtor_name="Zahler GmbH",
         debtor_iban="DE89\n3704 0044 0532013000",
-    )
+    ).decode("utf-8")
     assert "\t" not in xml and "\n0044" not in xml
     assert "<IBAN>DE89370400440532013000</IBAN>" in xml
     assert "<IBAN>DE02120300000000202051</IBAN>" in xml
 
 
+def test_sepa_stream_matches_generated_xml(tmp_path, monkeypatch):
+    """Gestreamtes SEPA-XML == generate_sepa_xml; die Datei wird beim Iterieren geschrieben."""
+    import sepa_export
+    monkeypatch.setattr(sepa_export, "generate_message_id", lambda: "SBS-TEST")
+    invoices = [
+        {"rechnungsaussteller": "Acme GmbH", "iban": "DE02120300000000202051", "betrag_brutto": 10.0,
+         "rechnungsnummer": "R-1", "bic": "BYLADEM1001"},
+        {"rechnungsaussteller": "Ohne IBAN", "betrag_brutto": 5.0, "rechnungsnummer": "R-2"},
+        {"rechnungsaussteller": "B & C", "iban": "DE89370400440532013000", "betrag_brutto": 5.5,
+         "rechnungsnummer": "R-3"},
+    ]
+    debtor = {"name": "Zahler GmbH", "iban": "DE89370400440532013000"}
+    out = tmp_path / "sepa.xml"
+
+    result = sepa_export.stream_invoices_to_sepa(invoices, debtor, output_path=str(out))
+    assert result["count"] == 2 and result["total"] == 15.5
+    assert result["warnings"] == ["Rechnung R-2: Keine IBAN"]
+    assert not out.exists()  # erst beim Iterieren geschrieben
+
+    streamed = b"".join(result["chunks"])
+    expected = sepa_export.export_invoices_to_sepa(invoices, debtor, output_path=str(tmp_path / "full.xml"))["xml"]
+
+    def strip_ts(xml):
+        return re.sub(r"<CreDtTm>[^<]*</CreDtTm>", "", xml)
+
+    assert strip_ts(streamed.decode("utf-8")) == strip_ts(expected.decode("utf-8"))
+    assert (tmp_path / "full.xml").read_bytes() == expected
+    assert out.read_bytes() == streamed
+    assert sepa_export.validate_sepa_file(str(out))["valid"] is True
+
+
+def test_sepa_stream_aborted_leaves_no_file(tmp_path):
+    """Abgebrochener Stream: weder Zieldatei noch .tmp bleiben liegen."""
+    import sepa_export
+    invoices = [
+        {"rechnungsaussteller": "A GmbH", "iban": "DE89370400440532013000", "betrag_brutto": 10.0,
+         "rechnungsnummer": "R-1"},
+    ]
+    debtor = {"name": "Zahler GmbH", "iban": "DE89370400440532013000"}
+    out = tmp_path / "sepa.xml"
+
+    chunks = sepa_export.stream_invoices_to_sepa(invoices, debtor, output_path=str(out))["chunks"]
+    next(chunks)
+    chunks.close()  # Client-Abbruch mitten im Stream
+
+    assert list(tmp_path.iterdir()) == []
+
 # --- Schritt 5: Kontierung ------------------------------------------------
 @pytest.mark.parametrize("satz,expected", [(19.0, 9), (7.0, 8), (0.0, 0), (None, 0)])
 def test_kontierung_steuerschluessel(satz, expected):
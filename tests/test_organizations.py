@@ -0,0 +1,116 @@
+"""Tests für Multi-Tenancy / Organizations (Rollen-Rang, Mitgliedschaften)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import organizations  # noqa: E402
+from organizations import OrgRole, RoleRank  # noqa: E402
+
+
+@pytest.fixture
+def org_db(tmp_path, monkeypatch):
+    """Temporäre SQLite-DB mit users/organizations/org_members."""
+    db_path = tmp_path / "test_orgs.db"
+    monkeypatch.setattr(database, "_ensure_db_path", lambda: db_path)
+
+    conn = database.get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT,
+            name TEXT,
+            current_org_id INTEGER
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE organizations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            slug TEXT,
+            plan TEXT
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE org_members (
+            org_id INTEGER,
+            user_id INTEGER,
+            role TEXT,
+            joined_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, user_id INTEGER)")
+    cur.execute("CREATE TABLE invoices (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT)")
+    cur.execute("INSERT INTO users (id, email, name) VALUES (1, 'owner@sbs.de', 'Owner')")
+    cur.execute("INSERT INTO users (id, email, name) VALUES (2, 'viewer@sbs.de', 'Viewer')")
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_role_rank_order():
+    assert RoleRank.VIEWER < RoleRank.MEMBER < RoleRank.ADMIN < RoleRank.OWNER
+
+
+def test_check_permission_uses_role_rank(org_db):
+    org = organizations.create_organization("ACME GmbH", owner_user_id=1)
+    organizations.add_member(org["id"], 2, OrgRole.VIEWER)
+
+    assert organizations.check_permission(1, org["id"], OrgRole.OWNER) is True
+    assert organizations.check_permission(2, org["id"], OrgRole.VIEWER) is True
+    assert organizations.check_permission(2, org["id"], OrgRole.MEMBER) is False
+
+
+def test_check_permission_non_member(org_db):
+    org = organizations.create_organization("ACME GmbH", owner_user_id=1)
+    assert organizations.check_permission(2, org["id"], OrgRole.VIEWER) is False
+
+
+def test_unknown_role_ranks_as_viewer(org_db):
+    org = organizations.create_organization("ACME GmbH", owner_user_id=1)
+    organizations.add_member(org["id"], 2, "guest")
+
+    assert organizations.check_permission(2, org["id"], OrgRole.VIEWER) is True
+    assert organizations.check_permission(2, org["id"], OrgRole.MEMBER) is False
+
+
+def test_organizations_with_current_matches_separate_queries(org_db):
+    first = organizations.create_organization("Beta AG", owner_user_id=1)
+    second = organizations.create_organization("Alpha GmbH", owner_user_id=1)
+    organizations.switch_organization(1, first["id"])
+
+    orgs, current = organizations.get_user_organizations_with_current(1)
+
+    assert orgs == organizations.get_user_organizations(1)
+    assert [o["id"] for o in orgs] == [second["id"], first["id"]]
+    assert current == organizations.get_current_org(1)
+    assert current["user_role"] == OrgRole.OWNER
+
+
+def test_organizations_with_current_without_membership(org_db):
+    orgs, current = organizations.get_user_organizations_with_current(2)
+    assert orgs == []
+    assert current is None
+
+
+def test_org_stats_counts_members_jobs_invoices(org_db):
+    org = organizations.create_organization("ACME GmbH", owner_user_id=1)
+    organizations.add_member(org["id"], 2, OrgRole.VIEWER)
+    conn = database.get_connection()
+    conn.executemany("INSERT INTO jobs (job_id, user_id) VALUES (?, ?)", [("j1", 1), ("j2", 2), ("j3", 99)])
+    conn.executemany("INSERT INTO invoices (job_id) VALUES (?)", [("j1",), ("j1",), ("j2",), ("j3",)])
+    conn.commit()
+    conn.close()
+
+    assert organizations.get_org_stats(org["id"]) == {"members": 2, "jobs": 2, "invoices": 3}
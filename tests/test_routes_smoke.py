@@ -139,3 +139,922 @@ def test_no_route_is_missing(client):
     for path in PAGES_200 + ALIASES_REDIRECT:
         r = client.get(path, follow_redirects=False)
         assert r.status_code != 404, f"{path} fehlt (404)"
+
+
+def test_api_unauthenticated_returns_401_json():
+    """Nicht angemeldet → 401 mit festem JSON-Body (kein Redirect, kein 5xx)."""
+    anon = fastapi_testclient.TestClient(web_app.app, base_url="https://app.sbsdeutschland.com")
+    for path in ("/api/organizations", "/api/reports/scheduled", "/api/2fa/status"):
+        r = anon.get(path)
+        assert r.status_code == 401, path
+        assert r.json() == {"error": "Not authenticated"}
+
+
+def test_org_routes_require_membership(client):
+    """Org-Routen: angemeldet, aber kein Mitglied → 403 mit Fehler-JSON."""
+    for path in ("/api/organizations/999/members", "/api/organizations/999/stats"):
+        r = client.get(path)
+        assert r.status_code == 403, path
+        assert r.json() == {"error": "No permission"}
+
+
+def test_list_organizations_etag_not_modified(client):
+    """Unveränderte Org-Liste → 304 bei passendem If-None-Match."""
+    r = client.get("/api/organizations")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag.startswith('W/"')
+
+    r304 = client.get("/api/organizations", headers={"If-None-Match": etag})
+    assert r304.status_code == 304
+    assert r304.content == b""
+
+    r_other = client.get("/api/organizations", headers={"If-None-Match": 'W/"stale"'})
+    assert r_other.status_code == 200
+    assert r_other.json() == r.json()
+
+
+def test_stripe_webhook_updates_subscription_status(client):
+    """Webhook ohne Secret (Test-Fallback) schreibt den Abo-Status in die DB."""
+    import json
+    import database
+    database.init_subscriptions_table()
+    conn = database.get_connection()
+    conn.execute(
+        "INSERT INTO subscriptions (user_id, plan, status, stripe_subscription_id, invoices_used) "
+        "VALUES (1, 'starter', 'active', 'sub_smoke', 7)"
+    )
+    conn.commit()
+    conn.close()
+
+    def _status():
+        conn = database.get_connection()
+        row = conn.execute(
+            "SELECT status, invoices_used FROM subscriptions WHERE stripe_subscription_id = 'sub_smoke'"
+        ).fetchone()
+        conn.close()
+        return tuple(row)
+
+    for event_type, obj, expected in [
+        ("invoice.payment_failed", {"subscription": "sub_smoke"}, ("payment_failed", 7)),
+        ("invoice.payment_succeeded", {"subscription": "sub_smoke"}, ("active", 0)),
+        ("customer.subscription.updated", {"id": "sub_smoke", "status": "active",
+                                           "cancel_at_period_end": True}, ("canceling", 0)),
+        ("customer.subscription.deleted", {"id": "sub_smoke"}, ("cancelled", 0)),
+    ]:
+        r = client.post("/api/stripe/webhook",
+                        content=json.dumps({"type": event_type, "data": {"object": obj}}))
+        assert r.status_code == 200, event_type
+        assert r.json() == {"received": True}
+        assert _status() == expected, event_type
+
+
+def test_user_with_subscription_join_and_cancel(client, monkeypatch):
+    """Ein JOIN liefert dasselbe wie get_user_by_id + get_user_subscription; Kündigung nutzt ihn."""
+    import database
+    database.init_subscriptions_table()
+    conn = database.get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE email = 'smoke@test.de'").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO subscriptions (user_id, plan, status, stripe_subscription_id, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(user_id, "starter", "active", "sub_old", "2026-01-01 00:00:00"),
+         (user_id, "professional", "active", "sub_new", "2026-02-01 00:00:00"),
+         (user_id, "enterprise", "cancelled", "sub_gone", "2026-03-01 00:00:00")],
+    )
+    conn.commit()
+    conn.close()
+
+    user, subscription = database.get_user_with_subscription(user_id)
+    assert user == database.get_user_by_id(user_id)
+    assert subscription == database.get_user_subscription(user_id)
+    assert subscription["stripe_subscription_id"] == "sub_new"
+    assert database.get_user_with_subscription(999999) == (None, None)
+
+    modified = []
+
+    async def _fake_stripe(resource, method, *args, **kwargs):
+        modified.append((method, args))
+
+    monkeypatch.setattr(web_app, "_stripe_call", _fake_stripe)
+    r = client.post("/api/subscription/cancel")
+    assert r.json()["success"] is True
+    assert modified == [("modify", ("sub_new",))]
+    assert database.get_user_subscription(user_id)["stripe_subscription_id"] == "sub_old"
+
+
+def test_subscription_status_batcher_coalesces_concurrent_updates(monkeypatch):
+    """Gleichzeitige Webhook-Updates landen in EINEM Schreibvorgang, in Reihenfolge."""
+    import asyncio
+    calls = []
+    monkeypatch.setattr(web_app, "_write_subscription_statuses", lambda rows: calls.append(rows))
+    batcher = web_app._SubscriptionStatusBatcher(window=0.01)
+
+    async def _burst():
+        await asyncio.gather(
+            batcher.submit("payment_failed", "sub_a"),
+            batcher.submit("active", "sub_a", reset_usage=True),
+            batcher.submit("cancelled", "sub_b"),
+        )
+
+    asyncio.run(_burst())
+    assert calls == [[("payment_failed", "sub_a", False), ("active", "sub_a", True), ("cancelled", "sub_b", False)]]
+
+
+def test_stripe_webhook_verifies_signature(client, monkeypatch):
+    """Mit Secret: gültige v1-Signatur → 200, falsche/abgelaufene → 400."""
+    import hashlib
+    import hmac
+    import json
+    import time
+    secret = "whsec_smoke"
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", secret)
+    payload = json.dumps({"type": "checkout.session.completed", "data": {"object": {}}}).encode()
+
+    def _sig(ts, body=payload):
+        mac = hmac.new(secret.encode(), f"{ts}.".encode() + body, hashlib.sha256).hexdigest()
+        return f"t={ts},v1={mac}"
+
+    now = int(time.time())
+    ok = client.post("/api/stripe/webhook", content=payload, headers={"Stripe-Signature": _sig(now)})
+    assert ok.status_code == 200
+    assert ok.json() == {"received": True}
+
+    for header in (_sig(now, b"tampered"), _sig(now - 3600), "t=abc,v1=00", None):
+        headers = {"Stripe-Signature": header} if header else {}
+        r = client.post("/api/stripe/webhook", content=payload, headers=headers)
+        assert r.status_code == 400, header
+
+
+def test_checkout_success_reload_is_idempotent(client, monkeypatch):
+    """Reload der Success-Seite: kein zweiter Stripe-Abruf, keine doppelten Abos."""
+    import types
+    import multi_product_subscriptions
+    retrieved, created = [], []
+    session = types.SimpleNamespace(
+        payment_status="paid", customer="cus_1", subscription="sub_1",
+        metadata={"user_id": "1", "product": "contract", "plan": "starter"},
+    )
+
+    async def _retrieve(sid):
+        retrieved.append(sid)
+        return session
+
+    monkeypatch.setattr(web_app.stripe.checkout.Session, "retrieve_async", _retrieve)
+    monkeypatch.setattr(multi_product_subscriptions, "create_product_subscription",
+                        lambda **kw: created.append(kw["stripe_subscription_id"]))
+    monkeypatch.setattr(web_app, "_checkout_session_cache", {})
+
+    for _ in range(3):
+        assert client.get("/checkout/success?session_id=cs_smoke").status_code == 200
+    assert retrieved == ["cs_smoke"]
+    assert created == ["sub_1"]
+
+
+def test_unpaid_checkout_session_is_not_cached(monkeypatch):
+    """"unpaid" ist kein Endzustand: erneuter Abruf bei Stripe statt Cache-Treffer."""
+    import asyncio
+    import types
+    retrieved = []
+    sessions = iter(["unpaid", "paid", "paid"])
+
+    async def _retrieve(sid):
+        retrieved.append(sid)
+        return types.SimpleNamespace(payment_status=next(sessions))
+
+    monkeypatch.setattr(web_app.stripe.checkout.Session, "retrieve_async", _retrieve)
+    monkeypatch.setattr(web_app, "_checkout_session_cache", {})
+
+    statuses = [asyncio.run(web_app._retrieve_checkout_session("cs_1")).payment_status for _ in range(3)]
+
+    assert statuses == ["unpaid", "paid", "paid"]
+    assert retrieved == ["cs_1", "cs_1"]
+
+
+def test_stripe_call_prefers_async_variant_else_thread():
+    """_stripe_call: *_async-Methode falls vorhanden, sonst Sync-Aufruf im Worker-Thread."""
+    import asyncio
+    import threading
+
+    class _Resource:
+        @staticmethod
+        def modify(sub_id, **kwargs):
+            return ("sync", sub_id, kwargs, threading.current_thread() is threading.main_thread())
+
+    class _AsyncResource(_Resource):
+        @staticmethod
+        async def modify_async(sub_id, **kwargs):
+            return ("async", sub_id, kwargs)
+
+    assert asyncio.run(web_app._stripe_call(_AsyncResource, "modify", "sub_1", x=1)) == ("async", "sub_1", {"x": 1})
+    assert asyncio.run(web_app._stripe_call(_Resource, "modify", "sub_1", x=1)) == ("sync", "sub_1", {"x": 1}, False)
+
+
+def test_contact_form_sends_mails_as_background_tasks(client, monkeypatch):
+    """Kontaktformular: Antwort sofort, beide Mails laufen als Background-Tasks."""
+    sent = []
+    monkeypatch.setattr(web_app, "send_subscription_email",
+                        lambda to, subject, body: sent.append((to, subject)))
+    r = client.post("/api/contact", json={"name": "Erika", "email": "erika@example.de",
+                                          "service": "Beratung", "message": "Hallo"})
+    assert r.json() == {"success": True, "message": "Nachricht gesendet"}
+    assert sent == [(web_app.SMTP_USER, "Kontaktanfrage: Beratung - Erika"),
+                    ("erika@example.de", "Ihre Anfrage bei SBS Deutschland")]
+
+
+def test_welcome_email_template_escapes_name(monkeypatch):
+    """Vorkompilierte Mail-Vorlage: Plan eingesetzt, Name HTML-escaped."""
+    sent = []
+    monkeypatch.setattr(web_app, "send_subscription_email",
+                        lambda to, subject, body: sent.append(body))
+    web_app.send_welcome_email("a@example.de", "<Max & Co>", "professional")
+    assert "<strong>Professional</strong>" in sent[0]
+    assert "Hallo &lt;Max &amp; Co&gt;," in sent[0]
+    assert "$" not in sent[0]
+
+
+def test_password_reset_email_reuses_sendgrid_client(monkeypatch):
+    """Reset-Mail: Vorlage mit Link befüllt, SendGrid-Client nur einmal gebaut."""
+    import sendgrid
+
+    built, sent = [], []
+
+    class FakeClient:
+        def __init__(self, api_key):
+            built.append(api_key)
+
+        def send(self, message):
+            sent.append(message.get())
+            return type("Resp", (), {"status_code": 202})()
+
+    monkeypatch.setattr(sendgrid, "SendGridAPIClient", FakeClient)
+    monkeypatch.setattr(web_app, "_sendgrid_client", None)
+    monkeypatch.setenv("SENDGRID_API_KEY", "SG.test")
+    monkeypatch.setenv("APP_BASE_URL", "https://example.de")
+
+    web_app.send_password_reset_email("a@example.de", "tok1")
+    web_app.send_password_reset_email("b@example.de", "tok2")
+
+    assert built == ["SG.test"]
+    body = sent[1]["content"][0]["value"]
+    assert "https://example.de/password-reset/confirm?token=tok2" in body
+    assert "$" not in body
+
+
+def test_reset_confirm_caches_token_check_and_rate_limits(client, monkeypatch):
+    """Reset-Link-GET: Token-Prüfung kurz gecacht, Hämmern wird mit 429 gebremst."""
+    import rate_limiter
+
+    calls = []
+    monkeypatch.setattr(web_app, "verify_reset_token", lambda tok: calls.append(tok))
+    web_app._reset_token_cache.clear()
+    rate_limiter.limiter.requests.clear()
+
+    for _ in range(3):
+        r = client.get("/password-reset/confirm?token=bogus")
+        assert r.status_code == 200
+    assert calls == ["bogus"]
+
+    limit, _window = rate_limiter.RATE_LIMITS["password_reset"]
+    statuses = [client.get(f"/password-reset/confirm?token=t{i}").status_code for i in range(limit)]
+    assert statuses[-1] == 429
+    rate_limiter.limiter.requests.clear()
+
+
+def test_finance_copilot_query_caches_llm_answer(client, monkeypatch):
+    """Gleiche Frage zum selben Snapshot: zweiter Aufruf aus dem Cache (X-Cache: HIT)."""
+    from types import SimpleNamespace
+
+    calls = []
+
+    class FakeCompletions:
+        async def create(self, messages, **kwargs):
+            calls.append(kwargs["model"])
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Antwort"))])
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(web_app, "_get_finance_copilot_client", lambda: fake)
+    monkeypatch.setattr(web_app, "_finance_copilot_cache", web_app.OrderedDict())
+    monkeypatch.setattr(web_app, "get_finance_snapshot", lambda days, user_id: {"total": 1})
+
+    first = client.post("/api/copilot/finance/query", json={"question": "Top Lieferanten?", "days": 30})
+    second = client.post("/api/copilot/finance/query", json={"question": "  top lieferanten? ", "days": 30})
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    body = second.json()
+    assert (body["answer"], body["question"], body["days"], body["snapshot"]) == (
+        "Antwort", "top lieferanten?", 30, {"total": 1})
+    assert body["suggested_questions"]
+    assert calls == [web_app.FINANCE_COPILOT_MODEL]
+
+
+def test_finance_copilot_query_streams_sse(client, monkeypatch):
+    """Accept: text/event-stream → Kontext-Event, Text-Deltas, [DONE]; Antwort danach gecacht."""
+    import json
+    from types import SimpleNamespace
+
+    calls = []
+
+    def _chunk(text):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    class FakeCompletions:
+        async def create(self, stream=False, **kwargs):
+            calls.append(stream)
+
+            async def _gen():
+                for text in ("Hallo ", None, "CFO"):
+                    yield _chunk(text)
+            return _gen()
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(web_app, "_get_finance_copilot_client", lambda: fake)
+    monkeypatch.setattr(web_app, "_finance_copilot_cache", web_app.OrderedDict())
+    monkeypatch.setattr(web_app, "get_finance_snapshot",
+                        lambda days, user_id: {"kpis": {"total_gross": 10.0}})
+
+    r = client.post("/api/copilot/finance/query", json={"question": "Kosten?", "days": 30},
+                    headers={"Accept": "text/event-stream"})
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.headers["X-Cache"] == "MISS"
+    events = [line[len("data: "):] for line in r.text.split("\n\n") if line]
+    assert events[-1] == "[DONE]"
+    opening = json.loads(events[0])
+    assert opening["days"] == 30 and opening["kpis"] == {"total_gross": 10.0}
+    assert opening["suggested_questions"]
+    assert [json.loads(e)["delta"] for e in events[1:-1]] == ["Hallo ", "CFO"]
+    assert calls == [True]
+
+    cached = client.post("/api/copilot/finance/query", json={"question": "Kosten?", "days": 30})
+    assert cached.headers["X-Cache"] == "HIT"
+    assert cached.json()["answer"] == "Hallo CFO"
+
+
+@pytest.mark.parametrize("accept", ["application/json", "text/event-stream"])
+def test_finance_copilot_query_rejects_oversized_prompt(client, monkeypatch, accept):
+    """Prompt über dem Kontextfenster → 413 vor jedem LLM-Aufruf, auch im SSE-Pfad."""
+    monkeypatch.setattr(web_app, "_get_finance_copilot_client", lambda: pytest.fail("kein LLM-Aufruf"))
+    monkeypatch.setattr(web_app, "_finance_copilot_cache", web_app.OrderedDict())
+    monkeypatch.setattr(web_app, "get_finance_snapshot", lambda days, user_id: {})
+    monkeypatch.setattr(web_app, "FINANCE_COPILOT_CONTEXT_TOKENS", 10)
+
+    r = client.post("/api/copilot/finance/query", json={"question": "Kosten?", "days": 30},
+                    headers={"Accept": accept})
+
+    assert r.status_code == 413
+    assert "prompt_too_long" in r.text
+
+
+def test_audit_log_stats_from_single_query(client, monkeypatch):
+    """Audit-Log-API: gefilterter Total + Kennzahlen aus einem Scan, auf eigene Einträge begrenzt."""
+    import audit
+    import database
+    audit.flush_audit_log()  # Login-Events des Fixtures nicht mitzählen
+    conn = database.get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE email = 'smoke@test.de'").fetchone()[0]
+    conn.execute("DELETE FROM audit_log")
+    conn.executemany(
+        "INSERT INTO audit_log (user_id, action, timestamp) VALUES (?, ?, datetime('now', ?))",
+        [(user_id, "auth.login", "+0 seconds"), (user_id, "auth.login", "-10 days"),
+         (user_id, "auth.login_failed", "-30 days"), (user_id, "export.zip", "+0 seconds"),
+         (user_id + 1, "auth.login", "+0 seconds")],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(web_app, "is_admin_user", lambda uid: False)
+
+    r = client.get("/api/audit-log", params={"action": "auth.login", "days": "7"})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["stats"] == {"total": 1, "today": 2, "logins_7d": 1, "failed_logins": 1}
+    assert [e["action"] for e in body["entries"]] == ["auth.login"]
+
+
+def test_audit_log_keyset_pagination(client, monkeypatch):
+    """Audit-Log-API: Folgeseiten über before_id-Cursor, erste Seite weiter per page/OFFSET."""
+    import audit
+    import database
+    audit.flush_audit_log()
+    conn = database.get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE email = 'smoke@test.de'").fetchone()[0]
+    conn.execute("DELETE FROM audit_log")
+    conn.executemany(
+        "INSERT INTO audit_log (user_id, action, timestamp) VALUES (?, ?, datetime('now', ?))",
+        [(user_id, f"export.csv{i}", f"-{5 - i} minutes") for i in range(5)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(web_app, "is_admin_user", lambda uid: False)
+
+    first = client.get("/api/audit-log", params={"limit": 2, "days": ""}).json()
+    second = client.get("/api/audit-log", params={"limit": 2, "days": "", **first["next_cursor"]}).json()
+    third = client.get("/api/audit-log", params={"limit": 2, "days": "", **second["next_cursor"]}).json()
+    legacy = client.get("/api/audit-log", params={"limit": 2, "days": "", "page": 2}).json()
+
+    assert [e["action"] for e in first["entries"]] == ["export.csv4", "export.csv3"]
+    assert [e["action"] for e in second["entries"]] == ["export.csv2", "export.csv1"]
+    assert second["entries"] == legacy["entries"]
+    assert [e["action"] for e in third["entries"]] == ["export.csv0"]
+    assert third["next_cursor"] is None
+    # Cursor nur mit ID (ältere Clients) → Zeitstempel wird nachgeschlagen
+    by_id = client.get("/api/audit-log", params={"limit": 2, "days": "", "before_id": first["next_cursor"]["before_id"]})
+    assert by_id.json()["entries"] == second["entries"]
+
+
+def test_audit_log_cursor_follows_timestamp_order(client, monkeypatch):
+    """id-Reihenfolge (Flush) ≠ timestamp-Reihenfolge (Auftreten): Seiten ohne Lücken/Doppelte."""
+    import audit
+    import database
+    audit.flush_audit_log()
+    conn = database.get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE email = 'smoke@test.de'").fetchone()[0]
+    conn.execute("DELETE FROM audit_log")
+    # Spätere IDs tragen frühere Zeitstempel (anderer Worker hat später geflusht)
+    conn.executemany(
+        "INSERT INTO audit_log (user_id, action, timestamp) VALUES (?, ?, datetime('now', ?))",
+        [(user_id, f"ev{i}", f"-{i} minutes") for i in (3, 1, 4, 0, 2)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(web_app, "is_admin_user", lambda uid: False)
+
+    seen, params = [], {"limit": 2, "days": ""}
+    while True:
+        data = client.get("/api/audit-log", params=params).json()
+        seen += [e["action"] for e in data["entries"]]
+        if not data["next_cursor"]:
+            break
+        params = {"limit": 2, "days": "", **data["next_cursor"]}
+
+    assert seen == ["ev0", "ev1", "ev2", "ev3", "ev4"]
+
+
+def test_team_members_uses_pooled_connection(client, monkeypatch):
+    """Team-API: Mitglieder, Rollen und aktive User über die Pool-Verbindung des Requests."""
+    import database
+    opened = []
+    real_connect = database.sqlite3.connect
+    monkeypatch.setattr(database.sqlite3, "connect", lambda *a, **k: opened.append(a) or real_connect(*a, **k))
+    monkeypatch.setattr(web_app, "is_admin_user", lambda uid: False)
+
+    first = client.get("/api/team/members")
+    second = client.get("/api/team/members")
+
+    assert first.status_code == second.status_code == 200
+    body = second.json()
+    assert [m["email"] for m in body["members"]] == ["smoke@test.de"]
+    assert body["members"][0]["is_current_user"] is True
+    assert isinstance(body["active_today"], int)
+    assert len(opened) <= 1  # zweiter Request nutzt die Verbindung aus dem Pool
+
+
+def test_team_members_roles_from_json_aggregate(client, monkeypatch):
+    """Team-API: Rollen je User als strukturiertes Array (auch mit Komma im Namen, ohne Farbe)."""
+    import database
+    conn = database.get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE email = 'smoke@test.de'").fetchone()[0]
+    conn.execute("INSERT OR REPLACE INTO roles (id, name, display_name, color) VALUES (901, 'qa', 'QA, Intern', NULL)")
+    conn.execute("INSERT OR IGNORE INTO user_roles (user_id, role_id) VALUES (?, 901)", (user_id,))
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(web_app, "is_admin_user", lambda uid: False)
+
+    r = client.get("/api/team/members")
+
+    conn = database.get_connection()
+    conn.execute("DELETE FROM user_roles WHERE role_id = 901")
+    conn.execute("DELETE FROM roles WHERE id = 901")
+    conn.commit()
+    conn.close()
+    assert r.status_code == 200
+    roles = r.json()["members"][0]["roles"]
+    assert {"id": 901, "display_name": "QA, Intern", "name": "qa,_intern", "color": "#64748b"} in roles
+
+
+def test_admin_check_memoized_per_request(client, monkeypatch):
+    """Admin-Status: eine DB-Abfrage pro Request, Rollen-Dropdown aus dem TTL-Cache."""
+    from starlette.requests import Request as StarletteRequest
+    calls = []
+    monkeypatch.setattr(web_app, "is_admin_user", lambda uid: calls.append(uid) or True)
+
+    request = StarletteRequest({"type": "http", "session": {"user_id": 7}})
+    assert web_app.is_admin_cached(request) is True
+    assert web_app.require_admin(request) is None
+    assert calls == [7]
+
+    monkeypatch.setattr(web_app, "_team_roles_cache", None)
+    first = client.get("/api/team/members").json()
+    roles_query = web_app._team_roles_cache
+    second = client.get("/api/team/members").json()
+    assert web_app._team_roles_cache is roles_query
+    assert first["roles"] == second["roles"]
+    assert len(calls) == 3  # je Request genau eine Admin-Abfrage
+
+
+def test_team_bulk_role_assignment_and_invites(client, monkeypatch):
+    """Team-Bulk-API: Rollen und Einladungen je ein executemany in einer Transaktion."""
+    import database
+    monkeypatch.setattr(web_app, "require_admin", lambda request: None)
+    monkeypatch.setattr(web_app, "_require_csrf_token", lambda *a, **k: None)
+    conn = database.get_connection()
+    user_id = conn.execute("SELECT id FROM users WHERE email = 'smoke@test.de'").fetchone()[0]
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS team_invitations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT, role_id INTEGER, invited_by INTEGER,
+            token TEXT, expires_at TEXT, status TEXT DEFAULT 'pending', created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT INTO user_roles (user_id, role_id) VALUES (?, 903)", (user_id,))
+    conn.execute("INSERT INTO team_invitations (email, role_id, invited_by, token) VALUES ('offen@test.de', 3, 1, 't')")
+    conn.commit()
+    conn.close()
+
+    roles = client.post("/api/team/roles/bulk", json={"assignments": [
+        {"user_id": user_id, "role_id": 901}, {"user_id": user_id, "role_id": 902},
+        {"user_id": user_id, "role_id": 903, "action": "remove"},
+    ]}).json()
+    invites = client.post("/api/team/invite/bulk", json={"invitations": [
+        {"email": "Neu1@Test.de", "role_id": 2}, {"email": "neu2@test.de"}, {"email": "kaputt"},
+        {"email": "smoke@test.de"}, {"email": "offen@test.de"}, "kein-objekt",
+    ]}).json()
+    bad_roles = client.post("/api/team/roles/bulk", json={"assignments": [{"user_id": user_id, "role_id": 901}, 5]})
+
+    conn = database.get_connection()
+    assigned = [r[0] for r in conn.execute("SELECT role_id FROM user_roles WHERE user_id = ? ORDER BY role_id", (user_id,))]
+    created = conn.execute("SELECT email, role_id, token FROM team_invitations WHERE email LIKE 'neu%' ORDER BY email").fetchall()
+    conn.execute("DELETE FROM user_roles WHERE role_id IN (901, 902, 903)")
+    conn.execute("DELETE FROM team_invitations")
+    conn.commit()
+    conn.close()
+    assert roles["success"] is True
+    assert [r for r in assigned if r >= 900] == [901, 902]
+    assert [(e, r) for e, r, _ in created] == [("neu1@test.de", 2), ("neu2@test.de", 3)]
+    assert created[0][2] != created[1][2]
+    assert [i["email"] for i in invites["invitations"]] == ["neu1@test.de", "neu2@test.de"]
+    assert [s["email"] for s in invites["skipped"]] == ["kaputt", "", "smoke@test.de", "offen@test.de"]
+    assert bad_roles.status_code == 400
+
+
+def test_accounting_accounts_sorted(client):
+    """Vorberechnete SKR03-Kontenliste: vollständig und nach Konto sortiert."""
+    from auto_accounting import SKR03_ACCOUNTS
+    r = client.get("/api/accounting/accounts")
+    assert r.status_code == 200
+    accounts = r.json()["accounts"]
+    assert [a["account"] for a in accounts] == sorted(SKR03_ACCOUNTS)
+    assert all(a["name"] == SKR03_ACCOUNTS[a["account"]]["name"] for a in accounts)
+
+
+def test_invoice_pdf_is_cached(monkeypatch):
+    """Gleiche Rechnungsfelder → PDF wird nur einmal gerendert."""
+    calls = []
+    real_generate = web_app.generate_invoice_pdf
+
+    def _generate(invoice_data):
+        calls.append(invoice_data["invoice_number"])
+        return real_generate(invoice_data)
+
+    monkeypatch.setattr(web_app, "generate_invoice_pdf", _generate)
+    web_app._cached_invoice_pdf.cache_clear()
+    fields = ("SBS-4711-202610", "17.10.2026", "Erika", "erika@example.de", "starter")
+
+    first = web_app._cached_invoice_pdf(*fields)
+    second = web_app._cached_invoice_pdf(*fields)
+
+    assert first.startswith(b"%PDF")
+    assert first is second
+    assert calls == ["SBS-4711-202610"]
+
+
+def test_invoice_pdf_template_substitution(monkeypatch):
+    """Template-PDF enthält die Felder wie das volle ReportLab-Rendering;
+    Markup/zu lange Werte fallen auf das Voll-Rendering zurück."""
+    web_app._invoice_pdf_template.cache_clear()
+    data = {"invoice_number": "SBS-7-202610", "date": "17.10.2026",
+            "customer_name": "Jürgen (Müller)", "customer_email": "j@example.de", "plan": "professional"}
+
+    pdf = web_app.generate_invoice_pdf(data)
+    full = web_app._render_invoice_pdf(data, page_compression=0)
+
+    assert pdf.startswith(b"%PDF") and b"@customer_name@" not in pdf
+    for needle in (b"(Rechnung Nr. SBS-7-202610", b"(Datum: 17.10.2026",
+                   b"(J\\374rgen \\(M\\374ller\\)", b"(j@example.de", b"Professional"):
+        assert needle in pdf and needle in full, needle
+
+    rendered = []
+    monkeypatch.setattr(web_app, "_render_invoice_pdf", lambda d, page_compression=None: rendered.append(d) or b"%PDF-full")
+    assert web_app.generate_invoice_pdf(dict(data, customer_name="<b>ACME</b>")) == b"%PDF-full"
+    assert web_app.generate_invoice_pdf(dict(data, customer_email="x" * 80)) == b"%PDF-full"
+    assert len(rendered) == 2
+
+
+def test_dashboard_widgets_data_bulk(client):
+    """Bulk-Endpoint liefert die Daten aller sichtbaren Widgets, nach ID."""
+    widgets = client.get("/api/dashboard/widgets").json()["widgets"]
+    r = client.get("/api/dashboard/widgets/data_bulk")
+    assert r.status_code == 200
+    data = r.json()["widgets"]
+    assert sorted(data) == sorted(str(w["id"]) for w in widgets)
+    assert all(data[str(w["id"])]["type"] == w["widget_type"] for w in widgets)
+
+
+@pytest.mark.parametrize("xml,valid,profile", [
+    ("", False, ""),
+    ("<kaputt", False, ""),
+    ('<?xml version="1.0" encoding="UTF-8"?><rsm:CrossIndustryInvoice '
+     'xmlns:rsm="urn:un:unece:uncefact:data:standard:CrossIndustryInvoice:100">'
+     "<ID>urn:cen.eu:en16931:2017#compliant#urn:XRechnung:3.0</ID></rsm:CrossIndustryInvoice>",
+     True, "XRechnung / EN16931 (CII)"),
+    (b"<Invoice><Note>Factur-X Basic</Note></Invoice>", True, "ZUGFeRD / Factur-X"),
+    ("<Invoice><ID>XRECHNUNG</ID><Note>ZUGFeRD 2.3</Note></Invoice>",
+     True, "XRechnung / EN16931 (CII) + ZUGFeRD/Factur-X"),
+    ("<Invoice><ID>R-1</ID></Invoice>", True, ""),
+    ('<rsm:CrossIndustryInvoice xmlns:rsm="urn:un:unece:uncefact:data:standard:CrossIndustryInvoice:100" '
+     'xmlns:ram="urn:un:unece:uncefact:data:standard:ReusableAggregateBusinessInformationEntity:100">'
+     "<rsm:ExchangedDocumentContext><ram:GuidelineSpecifiedDocumentContextParameter>"
+     "<ram:ID>urn:cen.eu:en16931:2017#conformant#urn:factur-x.eu:1p0:extended</ram:ID>"
+     "</ram:GuidelineSpecifiedDocumentContextParameter></rsm:ExchangedDocumentContext>"
+     "<rsm:SupplyChainTradeTransaction/></rsm:CrossIndustryInvoice>",
+     True, "XRechnung / EN16931 (CII) + ZUGFeRD/Factur-X"),
+    ('<rsm:CrossIndustryInvoice xmlns:rsm="urn:un:unece:uncefact:data:standard:CrossIndustryInvoice:100">'
+     "<rsm:Note>Erstellt mit ZUGFeRD-Tool</rsm:Note></rsm:CrossIndustryInvoice>",
+     True, "XRechnung / EN16931 (CII)"),
+    ('<rsm:CrossIndustryDocument xmlns:rsm="urn:ferd:CrossIndustryDocument:invoice:1p0"/>',
+     True, "ZUGFeRD / Factur-X"),
+    ('<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+     'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+     "<cbc:CustomizationID>urn:cen.eu:en16931:2017#compliant#urn:xeinkauf.de:kosit:xrechnung_3.0</cbc:CustomizationID>"
+     "</Invoice>",
+     True, "XRechnung / EN16931 (CII)"),
+    ("<CrossIndustryInvoice><Note>factur-x</Note></CrossIndustryInvoice>",
+     True, "XRechnung / EN16931 (CII) + ZUGFeRD/Factur-X"),
+])
+def test_validate_einvoice_profiles(xml, valid, profile):
+    is_valid, _, detected = web_app.validate_einvoice(xml)
+    assert (is_valid, detected) == (valid, profile)
+
+
+
+def test_audit_log_page_cached_with_etag(client, monkeypatch):
+    """Audit-Log-Seite: einmal gerendert, Revalidierung per ETag → 304; ohne Admin → Redirect."""
+    monkeypatch.setattr(web_app, "is_admin_or_owner", lambda user_id: True)
+    web_app._static_page_cache.clear()
+    r = client.get("/audit-log", follow_redirects=False)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/html")
+    r304 = client.get("/audit-log", headers={"If-None-Match": r.headers["etag"]}, follow_redirects=False)
+    assert r304.status_code == 304
+
+    monkeypatch.setattr(web_app, "is_admin_or_owner", lambda user_id: False)
+    assert client.get("/audit-log", follow_redirects=False).status_code == 303
+
+
+def test_user_dependency_routes_return_401_json():
+    """Routen mit require_user-Dependency: ohne Login dasselbe 401-JSON wie bisher."""
+    anon = fastapi_testclient.TestClient(web_app.app, base_url="https://app.sbsdeutschland.com")
+    for method, path in [("get", "/api/dashboard/widgets"), ("get", "/api/dashboard/widgets/data_bulk"),
+                         ("get", "/api/dashboard/widgets/1/data"), ("post", "/api/accounting/learn"),
+                         ("post", "/api/job/abc/export/sepa")]:
+        r = getattr(anon, method)(path)
+        assert r.status_code == 401, path
+        assert r.json() == {"error": "Not authenticated"}
+
+
+def test_sepa_export_download_sends_bytes_with_length(client, monkeypatch, tmp_path):
+    """SEPA-Export: ?download=1 liefert die XML-Bytes direkt, JSON-Variante bleibt gleich."""
+    import sepa_export
+    monkeypatch.setattr(web_app, "_require_csrf_token", lambda *a, **k: None)
+    monkeypatch.setattr(sepa_export, "_default_output_path", lambda: str(tmp_path / "sepa.xml"))
+    payload = {"invoices": [{"rechnungsaussteller": "Acme GmbH", "iban": "DE02120300000000202051",
+                             "betrag_brutto": 10.0, "rechnungsnummer": "R-1"}],
+               "debtor": {"name": "Zahler GmbH", "iban": "DE89370400440532013000"}}
+
+    raw = client.post("/api/export/sepa?download=1", json=payload)
+    assert raw.status_code == 200
+    assert raw.headers["content-type"] == "application/xml"
+    assert raw.headers["content-length"] == str(len(raw.content))
+    assert b"<IBAN>DE02120300000000202051</IBAN>" in raw.content
+
+    data = client.post("/api/export/sepa", json=payload).json()
+    assert data["count"] == 1 and isinstance(data["xml"], str)
+    assert "<IBAN>DE02120300000000202051</IBAN>" in data["xml"]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"total_invoices": 3}', {"total_invoices": 3}),
+    (b'{"a": 1}', {"a": 1}),
+    ({"a": 1}, {"a": 1}),
+    ("kaputt{", {}),
+    ("[1, 2]", {}),
+    (None, {}),
+])
+def test_parse_json_dict(raw, expected):
+    assert web_app._parse_json_dict(raw) == expected
+
+
+def test_buchungsvorschau_groups_by_konto(client, monkeypatch):
+    """Buchungsvorschau: Konten-Übersicht je Soll-Konto in Reihenfolge des ersten Auftretens."""
+    vorschau = [
+        {"soll_konto": "4930", "soll_konto_name": "Bürobedarf", "betrag_netto": 10.0, "betrag_brutto": 11.9, "mwst_betrag": 1.9},
+        {"soll_konto": "4210", "soll_konto_name": "Miete", "betrag_netto": 500.0, "betrag_brutto": 595.0, "mwst_betrag": 95.0},
+        {"soll_konto": "4930", "soll_konto_name": "Bürobedarf", "betrag_netto": 5.0, "betrag_brutto": 5.95, "mwst_betrag": 0.95},
+    ]
+    service = type("Service", (), {"get_buchungsvorschau": lambda self, ids: vorschau})()
+    monkeypatch.setattr(web_app, "_require_csrf_token", lambda *a, **k: None)
+    monkeypatch.setattr(web_app, "get_kontierung_service", lambda skr: service)
+
+    r = client.post("/api/kontierung/vorschau", json={"invoice_ids": [1, 2, 3]})
+
+    assert r.status_code == 200
+    assert r.json()["konten_uebersicht"] == [
+        {"konto": "4930", "name": "Bürobedarf", "count": 2, "summe": 15.0},
+        {"konto": "4210", "name": "Miete", "count": 1, "summe": 500.0},
+    ]
+
+
+def test_job_details_page_renders_from_parallel_reads(client, monkeypatch):
+    """Job-Detailseite: Rechnungen, Aussteller, Duplikate, Warnungen parallel geladen."""
+    job_id = "parallel-reads-job"
+    invoices = [{"id": 1, "rechnungsnummer": "P-1", "rechnungsaussteller": "ACME GmbH", "betrag_brutto": 42.0}]
+    monkeypatch.setitem(web_app.processing_jobs, job_id, {"job_id": job_id, "status": "completed", "stats": "{}"})
+    monkeypatch.setattr(web_app, "get_invoices_by_job", lambda jid: invoices)
+    monkeypatch.setattr(web_app, "get_aussteller_stats_by_job",
+                        lambda jid: [{"name": "ACME GmbH", "count": 1, "total": 42.0}])
+    monkeypatch.setattr(web_app, "get_duplicates_for_job", lambda jid: [])
+    monkeypatch.setattr(web_app, "get_plausibility_warnings_for_job", lambda jid: [])
+    monkeypatch.setattr(web_app, "get_invoice_categories_bulk", lambda ids: {})
+
+    r = client.get(f"/job/{job_id}")
+
+    assert r.status_code == 200
+    assert "ACME GmbH" in r.text
+    job = web_app.processing_jobs[job_id]
+    assert (job["total_files"], job["total_amount"], job["stats"]) == (1, 42.0, {"total_invoices": 1})
+
+
+def test_xrechnung_export_reuses_cached_xml(client, monkeypatch):
+    """XRechnung-Export: gleiche Rechnungsinhalte werden nur einmal serialisiert."""
+    invoices = [{"id": 1, "rechnungsnummer": "C-1", "betrag_brutto": 10.0}]
+    calls = []
+    monkeypatch.setattr(web_app, "_xrechnung_cache", web_app.OrderedDict())
+    monkeypatch.setattr(web_app, "get_invoices_by_job", lambda job_id: invoices)
+    monkeypatch.setattr(web_app, "log_export", lambda *args: None)
+    monkeypatch.setattr(web_app, "generate_xrechnung", lambda inv: calls.append(inv) or f"<I>{inv['betrag_brutto']}</I>")
+
+    first = client.get("/api/job/abcdef123456/export/xrechnung")
+    second = client.get("/api/job/abcdef123456/export/xrechnung")
+    invoices[0]["betrag_brutto"] = 20.0  # geänderter Inhalt → neuer Schlüssel
+    client.get("/api/job/abcdef123456/export/xrechnung")
+
+    assert first.content == second.content
+    assert len(calls) == 2
+
+
+def test_zip_package_export_streams_spooled_file(client, monkeypatch):
+    """ZIP-Paket: Builder schreibt in die Spool-Datei, Antwort gestreamt mit Content-Length."""
+    payload = b"PK" + bytes(range(256)) * 600  # > ein Stream-Block
+
+    def fake_zip(job_id, fileobj):
+        fileobj.write(payload)
+
+    monkeypatch.setattr(web_app, "create_zip_export", fake_zip)
+    r = client.get("/api/job/abcdef123456/export/zip")
+
+    assert r.status_code == 200
+    assert r.content == payload
+    assert r.headers["content-length"] == str(len(payload))
+    assert "invoice_package_abcdef12.zip" in r.headers["content-disposition"]
+
+
+def test_xrechnung_zip_export_is_streamed(client, monkeypatch):
+    """XRechnung-ZIP: gestreamt, vollständig lesbar, Export-Log mit tatsächlicher Größe."""
+    import io
+    import zipfile
+    invoices = [{"rechnungsnummer": f"R/{n}", "betrag_brutto": 10.0} for n in range(3)]
+    logged = []
+    monkeypatch.setattr(web_app, "get_invoices_by_job", lambda job_id: invoices)
+    monkeypatch.setattr(web_app, "log_export", lambda *args: logged.append(args))
+    monkeypatch.setattr(web_app, "generate_xrechnung", lambda inv: f"<Invoice>{inv['rechnungsnummer']}</Invoice>")
+
+    r = client.get("/api/job/abcdef123456/export/xrechnung")
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        assert zf.namelist() == ["xrechnung_R-0.xml", "xrechnung_R-1.xml", "xrechnung_R-2.xml"]
+        assert zf.read("xrechnung_R-1.xml") == b"<Invoice>R/1</Invoice>"
+    assert logged == [(logged[0][0], "abcdef123456", "xrechnung", "xrechnung_abcdef12.zip",
+                       len(r.content), 3, 30.0)]
+
+
+def test_zugferd_zip_export_generates_pdfs_in_parallel_in_order(client, monkeypatch):
+    """ZUGFeRD-ZIP: PDFs laufen parallel im PDF-Pool, ZIP-Reihenfolge bleibt erhalten."""
+    import io
+    import threading
+    import time
+    import zipfile
+    from concurrent.futures import ThreadPoolExecutor
+    invoices = [{"rechnungsnummer": f"Z{n}", "betrag_brutto": 5.0} for n in range(4)]
+    threads = []
+
+    def fake_pdf(inv):
+        threads.append(threading.current_thread().name)
+        if inv["rechnungsnummer"] == "Z0":
+            time.sleep(0.05)  # erstes PDF wird zuletzt fertig
+        return b"%PDF " + inv["rechnungsnummer"].encode()
+
+    pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pdf-worker")
+    monkeypatch.setattr(web_app, "_get_pdf_process_pool", lambda: pool)
+    monkeypatch.setattr(web_app, "get_invoices_by_job", lambda job_id: invoices)
+    monkeypatch.setattr(web_app, "log_export", lambda *args: None)
+    monkeypatch.setattr(web_app, "create_zugferd_from_invoice", fake_pdf)
+
+    r = client.get("/api/job/abcdef123456/export/zugferd")
+    pool.shutdown()
+
+    assert r.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        assert zf.namelist() == ["zugferd_Z0.pdf", "zugferd_Z1.pdf", "zugferd_Z2.pdf", "zugferd_Z3.pdf"]
+        assert zf.read("zugferd_Z1.pdf") == b"%PDF Z1"
+    assert len(threads) == 4 and all(name.startswith("pdf-worker") for name in threads)
+
+
+def test_zugferd_export_real_process_pool(client, monkeypatch):
+    """Echter ProcessPool (forkserver/spawn statt fork) erzeugt die PDFs in Kindprozessen."""
+    import io
+    import zipfile
+    invoices = [
+        {"rechnungsnummer": f"P{n}", "rechnungsaussteller": "ACME GmbH", "betrag_brutto": 11.9,
+         "betrag_netto": 10.0, "mwst_betrag": 1.9, "datum": "2025-01-15"}
+        for n in range(2)
+    ]
+    monkeypatch.setattr(web_app, "_pdf_process_pool", None)
+    monkeypatch.setattr(web_app, "get_invoices_by_job", lambda job_id: invoices)
+    monkeypatch.setattr(web_app, "log_export", lambda *args: None)
+
+    pool = web_app._get_pdf_process_pool()
+    try:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert pool.submit(os.getpid).result(timeout=60) != os.getpid()
+
+        r = client.get("/api/job/abcdef123456/export/zugferd")
+    finally:
+        pool.shutdown()
+
+    assert r.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        assert zf.namelist() == ["zugferd_P0.pdf", "zugferd_P1.pdf"]
+        assert zf.read("zugferd_P0.pdf").startswith(b"%PDF")
+
+
+def test_zip_export_failure_mid_stream_is_logged(caplog):
+    """Fehler nach dem ersten Eintrag: geloggt, weitergeworfen (Abbruch), kein Export-Log."""
+    import logging
+    done = []
+
+    def _entries():
+        yield "a.xml", b"<Invoice/>"
+        raise RuntimeError("PDF kaputt")
+
+    stream = web_app._iter_zip(_entries(), done.append)
+    assert next(stream)
+    with caplog.at_level(logging.ERROR), pytest.raises(RuntimeError):
+        list(stream)
+
+    assert done == []
+    assert "ZIP-Export abgebrochen nach 1 Einträgen" in caplog.text
+
+
+def test_zip_export_stores_incompressible_entries():
+    """Bereits komprimierte Einträge (z. B. PDF-Streams) landen unkomprimiert im ZIP."""
+    import io
+    import zipfile
+    noise = os.urandom(20_000)
+    xml = b"<Invoice>" + b"<Line>ACME</Line>" * 500 + b"</Invoice>"
+
+    data = b"".join(web_app._iter_zip([("a.pdf", noise), ("b.xml", xml)]))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        types = {info.filename: info.compress_type for info in zf.infolist()}
+        assert zf.read("a.pdf") == noise and zf.read("b.xml") == xml
+    assert types == {"a.pdf": zipfile.ZIP_STORED, "b.xml": zipfile.ZIP_DEFLATED}
+
+
+def test_legal_pages_served_as_static_files(client):
+    """Rechtliche Seiten: direkt aus web/static/legal, Revalidierung per ETag → 304."""
+    r = client.get("/legal/impressum.html")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/html")
+    assert "Impressum" in r.text
+    r304 = client.get("/legal/impressum.html", headers={"If-None-Match": r.headers["etag"]})
+    assert r304.status_code == 304
+    assert client.get("/legal/agb.html").status_code == 200
+    assert client.get("/legal/datenschutz.html").status_code == 200
+    assert "<style>" not in r.text and 'href="/static/legal.css?v=' in r.text
+    css = client.get("/static/legal.css")
+    assert css.status_code == 200 and ".info-box" in css.text
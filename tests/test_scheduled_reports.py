@@ -0,0 +1,128 @@
+"""Tests für Scheduled Reports (Anlage, Abfrage, Fälligkeit)."""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import scheduled_reports  # noqa: E402
+from scheduled_reports import ReportType, Schedule  # noqa: E402
+
+
+@pytest.fixture
+def reports_db(tmp_path, monkeypatch):
+    """Temporäre SQLite-DB mit scheduled_reports (Schema wie migration_notifications.sql)."""
+    db_path = tmp_path / "test_reports.db"
+    monkeypatch.setattr(database, "_ensure_db_path", lambda: db_path)
+
+    conn = database.get_connection()
+    conn.execute(
+        """
+        CREATE TABLE scheduled_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            user_email TEXT,
+            org_id INTEGER,
+            name TEXT NOT NULL,
+            report_type TEXT NOT NULL DEFAULT 'weekly',
+            schedule TEXT NOT NULL DEFAULT 'weekly',
+            recipients TEXT,
+            filters TEXT,
+            is_active INTEGER DEFAULT 1,
+            next_run TEXT,
+            last_run TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_get_user_reports_decodes_json_columns(reports_db):
+    scheduled_reports.create_scheduled_report(
+        user_id=1, name="Wochenbericht", report_type=ReportType.SUMMARY,
+        schedule=Schedule.WEEKLY, recipients=["a@sbs.de", "b@sbs.de"], filters={"days": 7},
+    )
+    scheduled_reports.create_scheduled_report(
+        user_id=2, name="Fremd", report_type=ReportType.SUMMARY,
+        schedule=Schedule.DAILY, recipients=[],
+    )
+
+    reports = scheduled_reports.get_user_reports(1)
+
+    assert len(reports) == 1
+    assert reports[0]["name"] == "Wochenbericht"
+    assert reports[0]["recipients"] == ["a@sbs.de", "b@sbs.de"]
+    assert reports[0]["filters"] == {"days": 7}
+
+
+def test_get_due_reports_only_active_and_due(reports_db):
+    past = (datetime.now() - timedelta(hours=1)).isoformat()
+    future = (datetime.now() + timedelta(days=1)).isoformat()
+    conn = database.get_connection()
+    conn.executemany(
+        "INSERT INTO scheduled_reports (user_id, name, recipients, is_active, next_run) VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, "faellig", '["x@sbs.de"]', 1, past),
+            (1, "inaktiv", None, 0, past),
+            (1, "spaeter", None, 1, future),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    due = scheduled_reports.get_due_reports()
+
+    assert [r["name"] for r in due] == ["faellig"]
+    assert due[0]["recipients"] == ["x@sbs.de"]
+    assert due[0]["filters"] == {}
+
+
+def test_run_scheduled_reports_dispatches_due_and_reschedules(reports_db, monkeypatch):
+    past = (datetime.now() - timedelta(hours=1)).isoformat()
+    conn = database.get_connection()
+    conn.executemany(
+        "INSERT INTO scheduled_reports (user_id, name, schedule, recipients, is_active, next_run) VALUES (?, ?, ?, ?, ?, ?)",
+        [(1, f"r{i}", Schedule.DAILY, '["x@sbs.de"]', 1, past) for i in range(3)],
+    )
+    conn.commit()
+    conn.close()
+
+    sent = []
+    monkeypatch.setattr(scheduled_reports, "generate_report_content", lambda report, user_id: {"title": report["name"]})
+    monkeypatch.setattr(scheduled_reports, "send_report_email", lambda report, content: sent.append(content["title"]))
+
+    scheduled_reports.run_scheduled_reports()
+
+    assert sorted(sent) == ["r0", "r1", "r2"]
+    assert scheduled_reports.get_due_reports() == []
+    assert all(r["last_run"] for r in scheduled_reports.get_user_reports(1))
+
+
+def test_run_scheduled_reports_isolates_failures(reports_db, monkeypatch):
+    past = (datetime.now() - timedelta(hours=1)).isoformat()
+    conn = database.get_connection()
+    conn.executemany(
+        "INSERT INTO scheduled_reports (user_id, name, schedule, recipients, is_active, next_run) VALUES (?, ?, ?, ?, ?, ?)",
+        [(1, "kaputt", Schedule.DAILY, "[]", 1, past), (1, "ok", Schedule.DAILY, "[]", 1, past)],
+    )
+    conn.commit()
+    conn.close()
+
+    def _content(report, user_id):
+        if report["name"] == "kaputt":
+            raise RuntimeError("boom")
+        return {"title": report["name"]}
+
+    monkeypatch.setattr(scheduled_reports, "generate_report_content", _content)
+    monkeypatch.setattr(scheduled_reports, "send_report_email", lambda report, content: True)
+
+    scheduled_reports.run_scheduled_reports()
+
+    assert [r["name"] for r in scheduled_reports.get_due_reports()] == ["kaputt"]
@@ -0,0 +1,194 @@
+"""Tests der statischen Generatoren (rechtliche Seiten, Landing Page).
+
+Prüft Rendern, Minifizieren, Vorkomprimierung und atomares Schreiben ohne
+laufende App; die Auslieferung über HTTP deckt test_routes_smoke.py ab.
+"""
+
+import pytest
+
+
+def test_legal_static_files_match_templates():
+    """web/static/legal/ entspricht den gerenderten Jinja-Templates (Generator erneut laufen lassen)."""
+    import importlib
+    legal = importlib.import_module("web.create_legal_pages_final")
+    for filename in legal.LEGAL_FILES:
+        rendered = legal.render_legal_page(filename)
+        assert rendered == (legal.LEGAL_DIR / filename).read_bytes(), filename
+        assert legal.render_legal_page(filename) is rendered  # gemerkt, kein zweites Rendern
+    assert b"Stand: November 2025" in legal.render_legal_page("agb.html")
+
+
+def test_legal_page_without_jinja_syntax_skips_compilation(monkeypatch, tmp_path):
+    """Template ohne {{ }}/{% %}: Quelltext direkt übernommen, Jinja wird nicht einmal aufgebaut."""
+    import importlib
+    legal = importlib.import_module("web.create_legal_pages_final")
+    (tmp_path / "legal").mkdir()
+    (tmp_path / "legal" / "plain.html").write_text("<p>Statisch</p>\n", encoding="utf-8")
+    monkeypatch.setattr(legal, "TEMPLATE_DIR", tmp_path)
+    monkeypatch.setattr(legal, "_ENV", None)
+    monkeypatch.setattr(legal, "_rendered", {})
+
+    assert legal.render_legal_page("plain.html") == b"<p>Statisch</p>\n"
+    assert legal._ENV is None
+
+
+def test_static_artifact_write_is_atomic(monkeypatch, tmp_path):
+    """Abgebrochener Schreibvorgang: alte Datei bleibt vollständig, keine .tmp-Reste."""
+    from web import static_artifacts
+    target = tmp_path / "agb.html"
+    static_artifacts.write_bytes(target, b"<p>alt</p>")
+
+    def _fail(fd, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(static_artifacts.os, "write", _fail)
+    with pytest.raises(OSError):
+        static_artifacts.write_bytes(target, b"<p>neu</p>")
+
+    assert target.read_bytes() == b"<p>alt</p>"
+    assert [p.name for p in tmp_path.iterdir()] == ["agb.html"]
+
+
+def test_legal_save_files_copies_build_artifacts(monkeypatch, tmp_path):
+    """save_files kopiert die gebauten Seiten + Sidecars 1:1 (sendfile), ohne neu zu rendern."""
+    import importlib
+    legal = importlib.import_module("web.create_legal_pages_final")
+    build, home = tmp_path / "build", tmp_path / "home"
+    build.mkdir()
+    home.mkdir()
+    payload = {}
+    for filename in legal.LEGAL_FILES:
+        payload[filename] = (f"<!DOCTYPE html><p>{filename}</p>\n" * 5000).encode()
+        (build / filename).write_bytes(payload[filename])
+        (build / (filename + ".gz")).write_bytes(b"gz-" + filename.encode())
+    monkeypatch.setattr(legal, "BUILD_DIR", build)
+    monkeypatch.setattr(legal, "HOMEPAGE_DIR", home)
+    monkeypatch.setattr(legal, "_HOMEPAGE_PATHS", {f: home / f for f in legal.LEGAL_FILES})
+    monkeypatch.setattr(legal, "published_page", lambda f: pytest.fail("neu gerendert"))
+
+    legal.save_files()
+
+    for filename in legal.LEGAL_FILES:
+        assert (home / filename).read_bytes() == payload[filename]
+        assert (home / (filename + ".gz")).read_bytes() == b"gz-" + filename.encode()
+    assert not list(home.glob("*.br")) and not list(home.glob("*.tmp"))
+
+
+def test_legal_rebuild_drops_stale_variants(monkeypatch, tmp_path):
+    """Ohne brotli/zstandard: alte .br/.dcz/legal.dict werden weder gebaut noch weiter veröffentlicht."""
+    import importlib
+    import shutil
+
+    from web import static_artifacts
+    legal = importlib.import_module("web.create_legal_pages_final")
+    build, home, static = tmp_path / "build", tmp_path / "home", tmp_path / "static"
+    for d in (build, home, static):
+        d.mkdir()
+    css = static / "legal.css"
+    shutil.copyfile(legal.LEGAL_CSS, css)
+    stale = [build / "agb.html.br", build / "agb.html.dcz", build / "legal.dict",
+             home / "agb.html.br", home / "agb.html.dcz", home / "legal.dict", static / "legal.css.br"]
+    for path in stale:
+        path.write_bytes(b"alt")
+    monkeypatch.setattr(static_artifacts, "brotli", None)
+    monkeypatch.setattr(legal, "zstandard", None)
+    monkeypatch.setattr(legal, "BUILD_DIR", build)
+    monkeypatch.setattr(legal, "LEGAL_DIR", static)
+    monkeypatch.setattr(legal, "LEGAL_CSS", css)
+    monkeypatch.setattr(legal, "HOMEPAGE_DIR", home)
+    monkeypatch.setattr(legal, "_HOMEPAGE_PATHS", {f: home / f for f in legal.LEGAL_FILES})
+
+    legal.build_static_files()
+    legal.save_files()
+
+    assert not any(path.exists() for path in stale)
+    assert (home / "agb.html.gz").exists() and (static / "legal.css.gz").exists()
+
+
+def test_legal_published_pages_are_minified(monkeypatch):
+    """Homepage-Variante: ohne Einrückung/Leerzeilen, Doctype und Text unverändert."""
+    import importlib
+    legal = importlib.import_module("web.create_legal_pages_final")
+    monkeypatch.setattr(legal, "minify_html", None)
+    monkeypatch.setattr(legal, "_minified", {})
+    for filename in legal.LEGAL_FILES:
+        full = legal.render_legal_page(filename).decode("utf-8")
+        published = legal.published_page(filename).decode("utf-8")
+        assert published.startswith("<!DOCTYPE html>")
+        assert len(published) < len(full)
+        assert "\n " not in published and "\n\n" not in published
+        assert published.split() == full.split()
+        assert legal.published_page(filename) is legal.published_page(filename)
+    with pytest.raises(ValueError):
+        legal._minify_html("<p>ohne Doctype</p>")
+
+
+def test_legal_dictionary_variant_roundtrip(monkeypatch):
+    """.dcz: RFC-9842-Header + zstd-Frame gegen das gemeinsame Dictionary, verlustfrei und kleiner."""
+    zstandard = pytest.importorskip("zstandard")
+    import hashlib
+    import importlib
+    legal = importlib.import_module("web.create_legal_pages_final")
+    monkeypatch.setattr(legal, "_shared_dict", {})
+    dictionary = legal.shared_dictionary()
+    assert legal.LEGAL_COMPANY["strasse"].encode() in dictionary
+    assert b'href="/static/legal.css?v=' in dictionary
+
+    zdict = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    for filename in legal.LEGAL_FILES:
+        page = legal.published_page(filename)
+        dcz = legal._dictionary_compress(page, dictionary)
+        assert dcz[:8] == legal._DCZ_MAGIC and dcz[8:40] == hashlib.sha256(dictionary).digest()
+        assert zstandard.ZstdDecompressor(dict_data=zdict).decompress(dcz[40:]) == page
+        assert len(dcz) < len(zstandard.ZstdCompressor(level=19).compress(page))
+
+
+def test_landing_inline_css_and_js_minified(monkeypatch):
+    """Landing Page: <style>/<script> ohne Kommentare/Einrückung, Markup unverändert."""
+    import importlib
+    landing = importlib.import_module("web.create_new_landing")
+    monkeypatch.setattr(landing, "rcssmin", None)
+    monkeypatch.setattr(landing, "rjsmin", None)
+    html = landing._minify(landing.LANDING_HTML)
+
+    css = html[html.find("<style>"):html.find("</style>")]
+    js = html[html.find("<script>"):html.find("</script>")]
+    assert "/*" not in css and "\n " not in css
+    assert "// Dark Mode" not in js and "\n " not in js
+    assert len(html) < len(landing.LANDING_HTML)
+    body = landing.LANDING_HTML[landing.LANDING_HTML.find("</style>"):landing.LANDING_HTML.find("<script>")]
+    assert body in html
+    assert landing.LANDING_HTML_MIN.startswith("<!DOCTYPE html>")
+
+
+def test_landing_main_swaps_atomically_with_backup(monkeypatch, tmp_path):
+    """main(): alte Seite als Backup (Hardlink), neue Bytes + .gz per os.replace, keine .tmp-Reste."""
+    import gzip
+    import importlib
+    landing = importlib.import_module("web.create_new_landing")
+    target = tmp_path / "index.html"
+    target.write_bytes(b"<p>alt</p>")
+    monkeypatch.setattr(landing, "LANDING_PATH", target)
+
+    landing.main()
+
+    assert target.read_bytes() == landing.LANDING_BYTES
+    assert (tmp_path / "index.html.backup").read_bytes() == b"<p>alt</p>"
+    assert gzip.decompress((tmp_path / "index.html.gz").read_bytes()) == landing.LANDING_BYTES
+    names = {p.name for p in tmp_path.iterdir()}
+    assert {"index.html", "index.html.backup", "index.html.gz"} <= names
+    assert not any(n.endswith(".tmp") for n in names)
+
+
+def test_landing_main_keeps_backup_when_page_missing(monkeypatch, tmp_path):
+    """Fehlt index.html, bleibt das vorhandene Backup (einzige Kopie) erhalten."""
+    import importlib
+    landing = importlib.import_module("web.create_new_landing")
+    target = tmp_path / "index.html"
+    (tmp_path / "index.html.backup").write_bytes(b"<p>letzte Version</p>")
+    monkeypatch.setattr(landing, "LANDING_PATH", target)
+
+    landing.main()
+
+    assert (tmp_path / "index.html.backup").read_bytes() == b"<p>letzte Version</p>"
+    assert target.read_bytes() == landing.LANDING_BYTES
@@ -0,0 +1,60 @@
+"""
+Gemeinsame Bausteine der statischen Generatoren (rechtliche Seiten, Landing Page):
+atomares Schreiben und vorkomprimierte Sidecars für nginx gzip_static/brotli_static.
+"""
+
+import gzip
+import os
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: ohne brotli nur .gz-Sidecars
+    brotli = None
+
+SIDECAR_SUFFIXES = ('.gz', '.br')
+
+
+def precompress(data: bytes) -> dict:
+    """Vorkomprimierte Varianten für nginx ``brotli_static``/``gzip_static``.
+
+    ``mtime=0`` hält die .gz-Datei bei gleichem Inhalt byte-identisch.
+    """
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    return variants
+
+
+def write_bytes(path: Path, data: bytes) -> None:
+    """Atomar schreiben: ``<name>.tmp`` ungepuffert füllen, dann ``os.replace``.
+
+    Der Webserver sieht so nie eine halb geschriebene Datei; schlägt das
+    Schreiben fehl, bleibt auch kein ``.tmp`` liegen.
+    """
+    tmp = path.with_name(path.name + '.tmp')
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_sidecars(path: Path, data: bytes) -> list:
+    """Vorkomprimierte Sidecars neben ``path``; liefert die Log-Zeilen."""
+    lines = []
+    variants = precompress(data)
+    for suffix, payload in variants.items():
+        write_bytes(path.with_name(path.name + suffix), payload)
+        lines.append(f"   + {path.name}{suffix} ({len(payload)} Bytes)")
+    for suffix in SIDECAR_SUFFIXES:
+        if suffix not in variants:  # z. B. brotli nicht mehr installiert: kein veralteter Sidecar
+            path.with_name(path.name + suffix).unlink(missing_ok=True)
+    return lines
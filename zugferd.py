@@ -6,6 +6,7 @@ Erstellt PDF/A-3 mit eingebettetem XML (Factur-X/ZUGFeRD 2.x)
 
 import io
 import logging
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
@@ -156,24 +157,20 @@ def create_zugferd_from_invoice(invoice_data: Dict, output_dir: str = "/tmp") ->
         c.save()
         buffer.seek(0)
         
-        # Temporäres PDF speichern
-        temp_pdf = Path(output_dir) / f"temp_{invoice_data.get('rechnungsnummer', 'inv')}.pdf"
-        with open(temp_pdf, 'wb') as f:
-            f.write(buffer.getvalue())
-        
-        # XML einbetten
-        output_pdf = str(temp_pdf).replace('.pdf', '_zugferd.pdf')
-        result = create_zugferd_pdf(str(temp_pdf), invoice_data, output_pdf)
-        
-        if result:
-            with open(result, 'rb') as f:
-                pdf_bytes = f.read()
+        # Temporäres PDF in eigenem Verzeichnis speichern – parallele Aufrufe
+        # (auch mit gleicher Rechnungsnummer) kommen sich nicht in die Quere
+        with tempfile.TemporaryDirectory(dir=output_dir, prefix="zugferd_") as tmp_dir:
+            temp_pdf = Path(tmp_dir) / "temp.pdf"
+            with open(temp_pdf, 'wb') as f:
+                f.write(buffer.getvalue())
             
-            # Cleanup
-            temp_pdf.unlink(missing_ok=True)
-            Path(output_pdf).unlink(missing_ok=True)
+            # XML einbetten
+            output_pdf = str(Path(tmp_dir) / "temp_zugferd.pdf")
+            result = create_zugferd_pdf(str(temp_pdf), invoice_data, output_pdf)
             
-            return pdf_bytes
+            if result:
+                with open(result, 'rb') as f:
+                    return f.read()
         
         return None
         